@@ -4,19 +4,113 @@ Database migration script to handle schema changes for anonymous submissions
 """
 
 import os
+import sys
 from flask import Flask
-from models.database import db
+from sqlalchemy.schema import CreateTable
+from models.database import db, engine_options_for, backfill_code_blobs
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def migrate_database():
-    """Drop and recreate database with updated schema"""
+def create_app():
+    """Create a minimal Flask app bound to the configured database"""
     app = Flask(__name__)
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///learning_recommender.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_for(app.config['SQLALCHEMY_DATABASE_URI'])
     
     db.init_app(app)
+    return app
+
+def add_missing_columns():
+    """ALTER TABLE ADD COLUMN for model columns the existing tables don't have yet.
+
+    Added columns are nullable with no default, which is all SQLite's ADD
+    COLUMN supports; changing an existing column still needs migrate_database().
+    """
+    inspector = db.inspect(db.engine)
+    quote = db.engine.dialect.identifier_preparer.quote
+    
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                
+                print(f"   + {table.name}.{column.name}")
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                connection.execute(db.text(
+                    f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+                ))
+
+def relax_not_null_columns():
+    """Rebuild tables whose columns are NOT NULL in the database but nullable in the models.
+
+    SQLite can't drop a NOT NULL constraint in place, so the table is
+    recreated from the model, its rows copied over, and the copy renamed.
+    Returns False when the database needs migrate_database() instead.
+    """
+    inspector = db.inspect(db.engine)
+    quote = db.engine.dialect.identifier_preparer.quote
+    
+    for table in db.metadata.sorted_tables:
+        existing = {column['name']: column for column in inspector.get_columns(table.name)}
+        relaxed = [
+            column.name for column in table.columns
+            if column.nullable and column.name in existing and not existing[column.name]['nullable']
+        ]
+        if not relaxed:
+            continue
+        
+        if db.engine.dialect.name != 'sqlite':
+            print(f"❌ {table.name}.{', '.join(relaxed)} must become nullable; run migrate_database.py without --indexes")
+            return False
+        
+        print(f"   ~ {table.name}: rebuilding to drop NOT NULL on {', '.join(relaxed)}")
+        # Copy the whole schema so the rebuilt table's foreign keys still resolve
+        metadata = db.MetaData()
+        for model_table in db.metadata.sorted_tables:
+            model_table.to_metadata(metadata)
+        rebuilt = table.to_metadata(metadata, name=f'{table.name}_rebuilt')
+        
+        columns = ', '.join(quote(column.name) for column in table.columns if column.name in existing)
+        with db.engine.begin() as connection:
+            connection.execute(CreateTable(rebuilt))
+            connection.execute(db.text(
+                f"INSERT INTO {quote(rebuilt.name)} ({columns}) SELECT {columns} FROM {quote(table.name)}"
+            ))
+            connection.execute(db.text(f"DROP TABLE {quote(table.name)}"))
+            connection.execute(db.text(f"ALTER TABLE {quote(rebuilt.name)} RENAME TO {quote(table.name)}"))
+    
+    return True
+
+def create_missing_indexes():
+    """Bring an existing database up to the models (tables, columns, nullability, indexes) without dropping data"""
+    app = create_app()
+    
+    with app.app_context():
+        print("🔨 Creating missing tables and columns...")
+        # create_all skips tables that already exist, so this only adds new ones
+        db.create_all()
+        add_missing_columns()
+        if not relax_not_null_columns():
+            sys.exit(1)
+        
+        moved = backfill_code_blobs()
+        if moved:
+            print(f"   Moved {moved} submission sources into submission_blob")
+        
+        print("🔨 Creating missing indexes...")
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                # checkfirst emits CREATE INDEX only when the index does not exist yet
+                index.create(bind=db.engine, checkfirst=True)
+        print("✅ Indexes are up to date!")
+
+def migrate_database():
+    """Drop and recreate database with updated schema"""
+    app = create_app()
     
     with app.app_context():
         # Check if database file exists
@@ -33,4 +127,7 @@ def migrate_database():
         print("   - Updated repr methods to handle anonymous users")
 
 if __name__ == "__main__":
-    migrate_database()
+    if len(sys.argv) > 1 and sys.argv[1] == '--indexes':
+        create_missing_indexes()
+    else:
+        migrate_database()
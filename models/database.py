@@ -1,13 +1,48 @@
+import hashlib
+import sqlite3
+import orjson
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from datetime import datetime
 
 db = SQLAlchemy()
 
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """Use WAL journaling so each commit costs one fsync instead of two"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.close()
+
+def engine_options_for(database_url):
+    """SQLALCHEMY_ENGINE_OPTIONS tuned for multi-worker serving"""
+    if database_url.startswith('sqlite'):
+        # SQLite has no server connections to pool; just allow cross-thread use
+        return {
+            'pool_pre_ping': True,
+            'connect_args': {'check_same_thread': False}
+        }
+    
+    return {
+        'pool_size': 20,
+        'max_overflow': 40,
+        'pool_pre_ping': True,  # Survive database restarts without OperationalError
+        'pool_recycle': 1800,
+        'pool_use_lifo': True  # Reuse the hottest connections first
+    }
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     
     # Learning profile
     skill_level = db.Column(db.String(20), default='beginner')  # beginner, intermediate, advanced
@@ -23,16 +58,17 @@ class User(db.Model):
 
 class Submission(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # Allow anonymous submissions
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)  # Allow anonymous submissions
     problem_title = db.Column(db.String(200), nullable=False)
-    code = db.Column(db.Text, nullable=False)
+    code = db.Column(db.Text, nullable=True)  # Legacy inline source; new rows store it in SubmissionBlob
+    code_sha256 = db.Column(db.String(64), db.ForeignKey('submission_blob.sha256'), index=True)
     language = db.Column(db.String(50), nullable=False)
     
     # Analysis results
     complexity_score = db.Column(db.Float, default=0.0)
     quality_score = db.Column(db.Float, default=0.0)
-    patterns_used = db.Column(db.Text)  # Comma-separated patterns
-    algorithms_identified = db.Column(db.Text)  # JSON string
+    patterns_used = db.Column(db.Text)  # JSON list (legacy rows: comma-separated)
+    algorithms_identified = db.Column(db.Text)  # JSON list (legacy rows: comma-separated)
     
     # Metrics
     lines_of_code = db.Column(db.Integer, default=0)
@@ -40,15 +76,32 @@ class Submission(db.Model):
     time_complexity = db.Column(db.String(50))
     space_complexity = db.Column(db.String(50))
     
-    submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), index=True)
+    
+    blob = db.relationship('SubmissionBlob', lazy=True)
+    
+    @property
+    def source_code(self):
+        """Submitted source, whether stored inline (legacy rows) or in the blob table"""
+        if self.code is not None:
+            return self.code
+        return self.blob.code if self.blob else None
     
     def __repr__(self):
         username = self.user.username if self.user else 'Anonymous'
         return f'<Submission {self.problem_title} by {username}>'
 
+class SubmissionBlob(db.Model):
+    # Content-addressed source storage keeps the hot submission rows small
+    sha256 = db.Column(db.String(64), primary_key=True)
+    code = db.Column(db.Text, nullable=False)
+    
+    def __repr__(self):
+        return f'<SubmissionBlob {self.sha256[:12]}>'
+
 class LearningPath(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     
     # Path details
     title = db.Column(db.String(200), nullable=False)
@@ -66,15 +119,15 @@ class LearningPath(db.Model):
     recommended_problems = db.Column(db.Text)  # JSON string of problems
     resources = db.Column(db.Text)  # JSON string of resources
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now(), onupdate=datetime.utcnow)
     
     def __repr__(self):
         return f'<LearningPath {self.title} for {self.user.username}>'
 
 class KnowledgeGap(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     
     # Gap details
     concept = db.Column(db.String(100), nullable=False)
@@ -82,13 +135,13 @@ class KnowledgeGap(db.Model):
     severity = db.Column(db.String(20))  # low, medium, high, critical
     
     # Identified from
-    identified_from_submission = db.Column(db.Integer, db.ForeignKey('submission.id'))
+    identified_from_submission = db.Column(db.Integer, db.ForeignKey('submission.id'), index=True)
     confidence_score = db.Column(db.Float, default=0.0)
     
     # Status
     status = db.Column(db.String(20), default='identified')  # identified, learning, mastered
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     resolved_at = db.Column(db.DateTime)
     
     def __repr__(self):
@@ -110,24 +163,134 @@ class Resource(db.Model):
     rating = db.Column(db.Float, default=0.0)
     rating_count = db.Column(db.Integer, default=0)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     
     def __repr__(self):
         return f'<Resource {self.title}>'
 
 class ProgressMetric(db.Model):
+    __table_args__ = (
+        # Serves per-user lookups filtered by metric and/or a recorded_at window
+        db.Index('ix_progress_metric_user_name_time', 'user_id', 'metric_name', 'recorded_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
     # Metrics
-    metric_name = db.Column(db.String(100), nullable=False)
+    metric_name = db.Column(db.String(100), nullable=False, index=True)
     metric_value = db.Column(db.Float, nullable=False)
     metric_type = db.Column(db.String(50))  # score, time, count, percentage
     
     # Context
     context = db.Column(db.Text)  # JSON string with additional context
     
-    recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    recorded_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
     
     def __repr__(self):
         return f'<ProgressMetric {self.metric_name}: {self.metric_value}>'
+
+# Submission columns holding pattern/algorithm name lists
+CONCEPT_COLUMNS = ('patterns_used', 'algorithms_identified')
+
+def encode_concepts(concepts):
+    """Encode a list of pattern/algorithm names for a Submission text column"""
+    return orjson.dumps(list(concepts or ())).decode('utf-8')
+
+def decode_concepts(value):
+    """Decode a pattern/algorithm column; accepts JSON lists and legacy comma-separated rows"""
+    if not value:
+        return []
+    
+    if value.startswith('['):
+        try:
+            return [str(concept) for concept in orjson.loads(value)]
+        except orjson.JSONDecodeError:
+            pass
+    
+    return [concept.strip() for concept in value.split(',') if concept.strip()]
+
+def code_sha256(code):
+    """Content hash used as the SubmissionBlob key"""
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+def _store_code_blobs(codes):
+    """Add blobs for any of the given sources not stored yet; returns their hashes.
+
+    The caller is responsible for committing the session.
+    """
+    hashes = [code_sha256(code) for code in codes]
+    blobs = dict(zip(hashes, codes))
+    if not blobs:
+        return []
+    
+    existing = {
+        sha for (sha,) in db.session.query(SubmissionBlob.sha256)
+        .filter(SubmissionBlob.sha256.in_(list(blobs)))
+    }
+    new_blobs = [{'sha256': sha, 'code': code} for sha, code in blobs.items() if sha not in existing]
+    if new_blobs:
+        db.session.bulk_insert_mappings(SubmissionBlob, new_blobs)
+    
+    return hashes
+
+def bulk_create_submissions(rows):
+    """Insert many submissions in one round-trip and commit once.
+
+    Each row is a dict of Submission column values. A ``code`` value is
+    moved into the deduplicated SubmissionBlob table and replaced with its
+    ``code_sha256``. List values for the concept columns are stored with
+    encode_concepts. Returns the new ids in the same order as ``rows``.
+    """
+    if not rows:
+        return []
+    
+    # Work on copies so the caller's dicts keep their 'code' and don't gain an 'id'
+    rows = [dict(row) for row in rows]
+    for row in rows:
+        for column in CONCEPT_COLUMNS:
+            if isinstance(row.get(column), (list, tuple, set, frozenset)):
+                row[column] = encode_concepts(row[column])
+    
+    try:
+        code_rows = [row for row in rows if row.get('code') is not None]
+        hashes = _store_code_blobs([row.pop('code') for row in code_rows])
+        for row, sha in zip(code_rows, hashes):
+            row['code_sha256'] = sha
+        
+        db.session.bulk_insert_mappings(Submission, rows, return_defaults=True)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return [row['id'] for row in rows]
+
+def backfill_code_blobs(batch_size=500):
+    """Move legacy inline Submission.code into SubmissionBlob; returns the number of rows moved.
+
+    Requires submission.code to be nullable, since moved rows keep only
+    their code_sha256.
+    """
+    moved = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Submission.id, Submission.code)
+            .where(Submission.code.is_not(None), Submission.code_sha256.is_(None))
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return moved
+        
+        try:
+            hashes = _store_code_blobs([code for _, code in rows])
+            db.session.execute(db.update(Submission), [
+                {'id': submission_id, 'code': None, 'code_sha256': sha}
+                for (submission_id, _), sha in zip(rows, hashes)
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        moved += len(rows)
@@ -83,6 +83,33 @@ def run_tests():
         print(f"❌ System tests failed: {e}")
         print("The system may still work, but there might be issues")
 
+def start_production_server():
+    """Serve the app with gunicorn worker processes instead of the dev server"""
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print("❌ gunicorn is not installed")
+        print("Please run: pip install -r requirements.txt")
+        sys.exit(1)
+    
+    workers = os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1))
+    threads = os.getenv('WEB_THREADS', '8')
+    bind = os.getenv('BIND', '0.0.0.0:5000')
+    
+    print(f"\n🌐 Starting gunicorn on {bind} ({workers} workers x {threads} threads)...")
+    
+    # Requests spend nearly all their time waiting on LLM/DB I/O, so threaded
+    # workers give concurrency without changing the blocking code
+    os.execvp(sys.executable, [
+        sys.executable, '-m', 'gunicorn',
+        '--worker-class', 'gthread',
+        '--workers', workers,
+        '--threads', threads,
+        '--bind', bind,
+        '--timeout', '120',
+        'app:app'
+    ])
+
 def start_application():
     """Start the Flask application"""
     print("\n🌐 Starting web application...")
@@ -116,14 +143,16 @@ Usage: python run.py [option]
 
 Options:
   --help, -h     Show this help message
-  --test         Run system tests only
-  --setup        Setup and check environment only
+  --test         Run system tests only (not run on normal startup)
+  --setup        Check environment and create database tables
   --dev          Run in development mode (default)
+  --prod         Run under gunicorn with multiple workers
 
 Examples:
+  python run.py --setup   # Create database tables (once, before first start)
   python run.py           # Start the application
   python run.py --test    # Run tests only
-  python run.py --setup   # Check setup only
+  python run.py --prod    # Start with gunicorn (WEB_CONCURRENCY, WEB_THREADS, BIND)
 
 Features:
 • Analyzes coding solutions for patterns and quality
@@ -155,15 +184,17 @@ def main():
             return
         elif arg == '--dev':
             pass  # Default behavior
+        elif arg == '--prod':
+            setup_environment()
+            start_production_server()
+            return
         else:
             print(f"Unknown option: {sys.argv[1]}")
             print("Use --help for available options")
             return
     
-    # Normal startup sequence
+    # Normal startup sequence; schema setup is a one-off step (--setup)
     setup_environment()
-    initialize_database()
-    run_tests()
     start_application()
 
 if __name__ == '__main__':
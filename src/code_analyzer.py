@@ -1,72 +1,352 @@
 import ast
 import re
 import json
-from typing import Dict, List, Any
-from collections import defaultdict
+import threading
+from typing import ClassVar, Dict, FrozenSet, List, Any, Optional, Set, Tuple, Deque
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .result_cache import ResultCache, content_key
+
+# Single-line snippets shorter than this skip the AST and pattern scans
+SMALL_INPUT_MAX_CHARS = 64
+
+# Escaped punctuation such as \( and any unescaped regex metacharacter
+_ESCAPED_PUNCTUATION_RE = re.compile(r'\\([^A-Za-z0-9])')
+_REGEX_METACHARACTER_RE = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
+def _appears_in_order_on_one_line(text: str, first: str, second: str) -> bool:
+    """Linear-time equivalent of re.search(first + '.*' + second, text) for literal parts"""
+    start = text.find(first)
+    while start != -1:
+        line_end = text.find('\n', start)
+        if line_end == -1:
+            line_end = len(text)
+        # The earliest occurrence on a line leaves the most room for the second part
+        if text.find(second, start + len(first), line_end) != -1:
+            return True
+        start = text.find(first, line_end)
+    return False
+
+try:
+    # Optional accelerator (pip install pyahocorasick); keyword scans fall back to substring checks
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    # Optional accelerator (pip install hyperscan); pattern tables fall back to the matchers below
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# (literal substrings, literal first.*second pairs, alternation of remaining regexes)
+CategoryMatcher = Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...], Optional[re.Pattern]]
+# (literal -> owners, first.*second pair -> owners, owner -> regex), where owners are (table, category)
+ConceptIndex = Tuple[
+    Dict[str, FrozenSet[Tuple[str, str]]],
+    Dict[Tuple[str, str], FrozenSet[Tuple[str, str]]],
+    Dict[Tuple[str, str], re.Pattern]
+]
+# Tables whose categories are reported together as concepts (algorithms, data structures)
+CONCEPT_TABLES = ('algorithms', 'data_structures')
+
+_worker_analyzer: Optional['CodeAnalyzer'] = None
+
+def _analyze_in_worker(item: Tuple[str, str]) -> Dict[str, Any]:
+    """Analyze one (code, language) pair with a per-process CodeAnalyzer"""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = CodeAnalyzer()
+    code, language = item
+    return _worker_analyzer.analyze_code(code, language)
 
 class CodeAnalyzer:
-    def __init__(self):
-        self.algorithm_patterns = {
-            'dynamic_programming': [
-                r'dp\[.*\]', r'memo\[.*\]', r'cache\[.*\]',
-                r'@lru_cache', r'@cache', r'tabulation'
-            ],
-            'greedy': [
-                r'greedy', r'local.*optimal', r'sort.*reverse',
-                r'heappush', r'heappop', r'priority.*queue'
-            ],
-            'divide_and_conquer': [
-                r'divide.*conquer', r'merge.*sort', r'quick.*sort',
-                r'binary.*search', r'recursion.*half'
-            ],
-            'backtracking': [
-                r'backtrack', r'dfs.*return', r'recursive.*choice',
-                r'restore.*state', r'prune.*branch'
-            ],
-            'sliding_window': [
-                r'sliding.*window', r'two.*pointer', r'left.*right',
-                r'window.*size', r'expand.*contract'
-            ],
-            'tree_traversal': [
-                r'inorder', r'preorder', r'postorder', r'level.*order',
-                r'bfs', r'dfs', r'queue.*append', r'stack.*append'
-            ],
-            'graph_algorithms': [
-                r'dijkstra', r'bellman.*ford', r'floyd.*warshall',
-                r'union.*find', r'topological.*sort', r'adjacency'
-            ]
+    # Pattern tables are shared by every instance; their compiled forms are
+    # built once at import by _compile_shared_tables below
+    algorithm_patterns = {
+        'dynamic_programming': [
+            r'dp\[.*\]', r'memo\[.*\]', r'cache\[.*\]',
+            r'@lru_cache', r'@cache', r'tabulation'
+        ],
+        'greedy': [
+            r'greedy', r'local.*optimal', r'sort.*reverse',
+            r'heappush', r'heappop', r'priority.*queue'
+        ],
+        'divide_and_conquer': [
+            r'divide.*conquer', r'merge.*sort', r'quick.*sort',
+            r'binary.*search', r'recursion.*half'
+        ],
+        'backtracking': [
+            r'backtrack', r'dfs.*return', r'recursive.*choice',
+            r'restore.*state', r'prune.*branch'
+        ],
+        'sliding_window': [
+            r'sliding.*window', r'two.*pointer', r'left.*right',
+            r'window.*size', r'expand.*contract'
+        ],
+        'tree_traversal': [
+            r'inorder', r'preorder', r'postorder', r'level.*order',
+            r'bfs', r'dfs', r'queue.*append', r'stack.*append'
+        ],
+        'graph_algorithms': [
+            r'dijkstra', r'bellman.*ford', r'floyd.*warshall',
+            r'union.*find', r'topological.*sort', r'adjacency'
+        ]
+    }
+    
+    data_structure_patterns = {
+        'array': [r'list\[', r'array\[', r'\[\]', r'append\(', r'pop\('],
+        'hash_table': [r'dict\(', r'defaultdict', r'Counter', r'set\('],
+        'linked_list': [r'ListNode', r'next', r'head', r'tail'],
+        'stack': [r'stack', r'append\(', r'pop\(', r'LIFO'],
+        'queue': [r'queue', r'deque', r'popleft', r'appendleft', r'FIFO'],
+        'heap': [r'heapq', r'heappush', r'heappop', r'priority.*queue'],
+        'tree': [r'TreeNode', r'left', r'right', r'root', r'leaf'],
+        'graph': [r'graph', r'adjacency', r'edges', r'vertices', r'neighbors']
+    }
+    
+    complexity_indicators = {
+        'time': {
+            'O(1)': [r'constant.*time', r'single.*operation'],
+            'O(log n)': [r'binary.*search', r'tree.*height', r'heap.*operation'],
+            'O(n)': [r'linear.*search', r'single.*loop', r'one.*pass'],
+            'O(n log n)': [r'merge.*sort', r'heap.*sort', r'sort\('],
+            'O(n^2)': [r'nested.*loop', r'double.*loop', r'quadratic'],
+            'O(2^n)': [r'exponential', r'all.*subsets', r'brute.*force']
+        },
+        'space': {
+            'O(1)': [r'constant.*space', r'in.*place'],
+            'O(n)': [r'auxiliary.*array', r'recursion.*stack', r'hash.*table'],
+            'O(n^2)': [r'2d.*array', r'matrix', r'nested.*structure']
         }
-        
-        self.data_structure_patterns = {
-            'array': [r'list\[', r'array\[', r'\[\]', r'append\(', r'pop\('],
-            'hash_table': [r'dict\(', r'defaultdict', r'Counter', r'set\('],
-            'linked_list': [r'ListNode', r'next', r'head', r'tail'],
-            'stack': [r'stack', r'append\(', r'pop\(', r'LIFO'],
-            'queue': [r'queue', r'deque', r'popleft', r'appendleft', r'FIFO'],
-            'heap': [r'heapq', r'heappush', r'heappop', r'priority.*queue'],
-            'tree': [r'TreeNode', r'left', r'right', r'root', r'leaf'],
-            'graph': [r'graph', r'adjacency', r'edges', r'vertices', r'neighbors']
+    }
+    
+    # Keyword hints for common problem-solving patterns
+    pattern_checks = {
+        'two_pointers': ['left', 'right', 'start', 'end', 'i', 'j'],
+        'sliding_window': ['window', 'left', 'right', 'expand', 'contract'],
+        'fast_slow_pointers': ['slow', 'fast', 'tortoise', 'hare'],
+        'merge_intervals': ['merge', 'interval', 'overlap', 'start', 'end'],
+        'cyclic_sort': ['cycle', 'sort', 'position', 'place'],
+        'tree_dfs': ['dfs', 'depth', 'recursive', 'left', 'right'],
+        'tree_bfs': ['bfs', 'breadth', 'level', 'queue'],
+        'topological_sort': ['topological', 'indegree', 'outdegree', 'kahn'],
+        'binary_search': ['binary', 'search', 'mid', 'left', 'right'],
+        'modified_binary_search': ['rotated', 'pivot', 'search', 'sorted']
+    }
+    
+    _single_letter_name_re = re.compile(r'\b[a-z]\b')
+    
+    # Filled in by _compile_shared_tables
+    _matchers: ClassVar[Dict[str, Dict[str, CategoryMatcher]]]
+    _pattern_databases: ClassVar[Dict[str, Tuple[Any, List[str], threading.Lock]]]
+    _concept_index: ClassVar[ConceptIndex]
+    _keyword_automaton: ClassVar[Any]
+    _keyword_patterns: ClassVar[Dict[str, FrozenSet[str]]]
+    
+    # Per-instance state is just the caches and a flag; no instance __dict__ needed
+    __slots__ = ('_analysis_cache', '_concept_cache', 'fast_small_input')
+    
+    def __init__(self) -> None:
+        # Analysis is deterministic, so repeated snippets can reuse earlier results
+        self._analysis_cache = ResultCache(maxsize=512)
+        # Keyed on the lowercased text alone, so the same code analyzed under
+        # another language label (or via the SyntaxError fallback) skips the scans
+        self._concept_cache = ResultCache(maxsize=512)
+        
+        # Return a minimal analysis for trivial one-liners instead of running every scan
+        self.fast_small_input = True
+    
+    @classmethod
+    def _compile_shared_tables(cls) -> None:
+        """Compile every pattern table once for all instances"""
+        pattern_tables = {
+            'algorithms': cls.algorithm_patterns,
+            'data_structures': cls.data_structure_patterns,
+            'time': cls.complexity_indicators['time'],
+            'space': cls.complexity_indicators['space']
         }
-        
-        self.complexity_indicators = {
-            'time': {
-                'O(1)': [r'constant.*time', r'single.*operation'],
-                'O(log n)': [r'binary.*search', r'tree.*height', r'heap.*operation'],
-                'O(n)': [r'linear.*search', r'single.*loop', r'one.*pass'],
-                'O(n log n)': [r'merge.*sort', r'heap.*sort', r'sort\('],
-                'O(n^2)': [r'nested.*loop', r'double.*loop', r'quadratic'],
-                'O(2^n)': [r'exponential', r'all.*subsets', r'brute.*force']
-            },
-            'space': {
-                'O(1)': [r'constant.*space', r'in.*place'],
-                'O(n)': [r'auxiliary.*array', r'recursion.*stack', r'hash.*table'],
-                'O(n^2)': [r'2d.*array', r'matrix', r'nested.*structure']
+        cls._matchers = {table: cls._compile_matchers(patterns) for table, patterns in pattern_tables.items()}
+        cls._pattern_databases = {}
+        if hyperscan is not None:
+            cls._pattern_databases = {
+                table: cls._build_pattern_database(patterns) for table, patterns in pattern_tables.items()
             }
+        cls._concept_index = cls._build_concept_index(cls._matchers)
+        
+        cls._keyword_automaton = cls._build_keyword_automaton(cls.pattern_checks) if ahocorasick else None
+        # Fallback: test each distinct keyword once and credit every pattern it hints at
+        keyword_patterns: Dict[str, Set[str]] = defaultdict(set)
+        for pattern, keywords in cls.pattern_checks.items():
+            for keyword in keywords:
+                keyword_patterns[keyword].add(pattern)
+        cls._keyword_patterns = {keyword: frozenset(patterns) for keyword, patterns in keyword_patterns.items()}
+    
+    @staticmethod
+    def _literal_text(pattern: str) -> Optional[str]:
+        """Return the plain substring a pattern matches, or None if it needs the regex engine"""
+        if _REGEX_METACHARACTER_RE.search(_ESCAPED_PUNCTUATION_RE.sub('', pattern)):
+            return None
+        return _ESCAPED_PUNCTUATION_RE.sub(r'\1', pattern)
+    
+    @classmethod
+    def _literal_pair(cls, pattern: str) -> Optional[Tuple[str, str]]:
+        """Return (first, second) for a pattern of the form first.*second with literal parts"""
+        parts = pattern.split('.*')
+        if len(parts) != 2 or parts[0].endswith('\\'):
+            return None
+        first, second = cls._literal_text(parts[0]), cls._literal_text(parts[1])
+        if first is None or second is None:
+            return None
+        return first, second
+    
+    @classmethod
+    def _compile_matchers(cls, pattern_map: Dict[str, List[str]]) -> Dict[str, CategoryMatcher]:
+        """Split each category into literal substrings, literal first.*second pairs and one alternation of the rest"""
+        matchers: Dict[str, CategoryMatcher] = {}
+        for name, patterns in pattern_map.items():
+            literals: List[str] = []
+            pairs: List[Tuple[str, str]] = []
+            regexes: List[str] = []
+            for pattern in patterns:
+                lowered = pattern.lower()
+                literal = cls._literal_text(lowered)
+                pair = cls._literal_pair(lowered) if literal is None else None
+                if literal is not None:
+                    literals.append(literal)
+                elif pair is not None:
+                    pairs.append(pair)
+                else:
+                    regexes.append(pattern)
+            
+            regex = cls._compile_patterns({name: regexes})[name] if regexes else None
+            matchers[name] = (tuple(literals), tuple(pairs), regex)
+        return matchers
+    
+    @staticmethod
+    def _category_matches(matcher: CategoryMatcher, code_lower: str) -> bool:
+        """Check a compiled category against lowercased code, cheapest tests first"""
+        literals, pairs, regex = matcher
+        return (any(literal in code_lower for literal in literals)
+                or any(_appears_in_order_on_one_line(code_lower, first, second) for first, second in pairs)
+                or (regex is not None and regex.search(code_lower) is not None))
+    
+    @staticmethod
+    def _compile_patterns(pattern_map: Dict[str, List[str]]) -> Dict[str, re.Pattern]:
+        """Compile each category's patterns into one alternation matched against lowercased code"""
+        # One alternation per category (not one across categories): a single
+        # fused scan would report only the leftmost match, hiding categories
+        # that share a pattern such as append( for array and stack
+        return {
+            name: re.compile('|'.join(f'(?:{pattern.lower()})' for pattern in patterns))
+            for name, patterns in pattern_map.items()
         }
 
+    @staticmethod
+    def _build_concept_index(matchers: Dict[str, Dict[str, CategoryMatcher]]) -> ConceptIndex:
+        """Index each distinct literal and pair of the concept tables by the (table, category) owners it proves"""
+        literal_owners: Dict[str, Set[Tuple[str, str]]] = defaultdict(set)
+        pair_owners: Dict[Tuple[str, str], Set[Tuple[str, str]]] = defaultdict(set)
+        regexes: Dict[Tuple[str, str], re.Pattern] = {}
+        for table in CONCEPT_TABLES:
+            for category, (literals, pairs, regex) in matchers[table].items():
+                owner = (table, category)
+                for literal in literals:
+                    literal_owners[literal].add(owner)
+                for pair in pairs:
+                    pair_owners[pair].add(owner)
+                if regex is not None:
+                    regexes[owner] = regex
+        
+        return (
+            {literal: frozenset(owners) for literal, owners in literal_owners.items()},
+            {pair: frozenset(owners) for pair, owners in pair_owners.items()},
+            regexes
+        )
+    
+    @staticmethod
+    def _build_pattern_database(pattern_map: Dict[str, List[str]]) -> Tuple[Any, List[str], threading.Lock]:
+        """Compile a pattern table into a hyperscan database whose match ids are category indexes"""
+        categories = list(pattern_map)
+        expressions: List[bytes] = []
+        ids: List[int] = []
+        for index, category in enumerate(categories):
+            for pattern in pattern_map[category]:
+                expressions.append(pattern.lower().encode('utf-8'))
+                ids.append(index)
+        
+        database = hyperscan.Database()
+        database.compile(
+            expressions=expressions,
+            ids=ids,
+            elements=len(expressions),
+            # Only the first hit per category matters
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions)
+        )
+        # A database's scratch space must not be shared by concurrent scans
+        return database, categories, threading.Lock()
+    
+    def _matching_categories(self, table: str, code_lower: str, first_only: bool = False) -> List[str]:
+        """Return the categories of a pattern table that match, in declared order"""
+        database = self._pattern_databases.get(table)
+        if database is not None:
+            database, categories, lock = database
+            hits: Set[int] = set()
+            
+            def on_match(category_index: int, start: int, end: int, flags: int, context: Any) -> None:
+                hits.add(category_index)
+            
+            with lock:
+                database.scan(code_lower.encode('utf-8'), match_event_handler=on_match)
+            return [category for index, category in enumerate(categories) if index in hits]
+        
+        matched: List[str] = []
+        for category, matcher in self._matchers[table].items():
+            if self._category_matches(matcher, code_lower):
+                matched.append(category)
+                if first_only:
+                    break
+        return matched
+
+    @staticmethod
+    def _build_keyword_automaton(pattern_checks: Dict[str, List[str]]) -> Any:
+        """Build an Aho-Corasick automaton mapping each keyword to the patterns it hints at"""
+        keyword_patterns: Dict[str, List[str]] = defaultdict(list)
+        for pattern, keywords in pattern_checks.items():
+            for keyword in keywords:
+                keyword_patterns[keyword].append(pattern)
+        
+        automaton = ahocorasick.Automaton()
+        for keyword, patterns in keyword_patterns.items():
+            automaton.add_word(keyword, tuple(patterns))
+        automaton.make_automaton()
+        return automaton
+
     def analyze_code(self, code: str, language: str) -> Dict[str, Any]:
         """Analyze code and return comprehensive analysis"""
-        
+        if self.fast_small_input and self._is_small_input(code):
+            return self._analyze_small_input(code, language)
+        
+        key = content_key(code, language)
+        return self._analysis_cache.get_or_compute(key, lambda: self._analyze_uncached(code, language))
+    
+    @classmethod
+    def analyze_batch(cls, codes: List[Tuple[str, str]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Analyze many (code, language) pairs in parallel worker processes, preserving order"""
+        if len(codes) <= 1:
+            return [_analyze_in_worker(item) for item in codes]
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_analyze_in_worker, codes, chunksize=8))
+    
+    @staticmethod
+    def _is_small_input(code: str) -> bool:
+        """Check whether the snippet is a short single line"""
+        return len(code) < SMALL_INPUT_MAX_CHARS and '\n' not in code.strip()
+    
+    def _analyze_small_input(self, code: str, language: str) -> Dict[str, Any]:
+        """Build the minimal analysis for a trivial snippet without parsing or scanning it"""
         analysis = {
             'language': language,
             'complexity_score': 0.0,
@@ -74,17 +354,41 @@ class CodeAnalyzer:
             'patterns': [],
             'algorithms': [],
             'data_structures': [],
-            'time_complexity': 'Unknown',
-            'space_complexity': 'Unknown',
-            'metrics': {},
+            'time_complexity': 'O(1)',
+            'space_complexity': 'O(1)',
+            'metrics': {'lines_of_code': 1},
             'issues': [],
             'suggestions': []
         }
         
+        analysis['complexity_score'] = self._calculate_complexity_score(analysis)
+        analysis['quality_score'] = self._calculate_quality_score(analysis)
+        
+        return analysis
+    
+    def _analyze_uncached(self, code: str, language: str) -> Dict[str, Any]:
+        """Run the full analysis without consulting the cache"""
+        # Case-fold once; every keyword and regex scan works on the lowercased copy
+        code_lower = code.lower()
+        
         if language.lower() == 'python':
-            analysis = self._analyze_python_code(code, analysis)
+            results = self._analyze_python_code(code, code_lower)
         else:
-            analysis = self._analyze_generic_code(code, analysis)
+            results = self._analyze_generic_code(code, code_lower)
+        
+        analysis = {
+            'language': language,
+            'complexity_score': 0.0,
+            'quality_score': 0.0,
+            'patterns': results['patterns'],
+            'algorithms': results['algorithms'],
+            'data_structures': results['data_structures'],
+            'time_complexity': results['time_complexity'],
+            'space_complexity': results['space_complexity'],
+            'metrics': results['metrics'],
+            'issues': results.get('issues', []),
+            'suggestions': results.get('suggestions', [])
+        }
         
         # Calculate overall scores
         analysis['complexity_score'] = self._calculate_complexity_score(analysis)
@@ -92,165 +396,193 @@ class CodeAnalyzer:
         
         return analysis
 
-    def _analyze_python_code(self, code: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze Python code using AST"""
+    def _analyze_python_code(self, code: str, code_lower: str) -> Dict[str, Any]:
+        """Analyze Python code using AST and return the fields it determines"""
         try:
             tree = ast.parse(code)
-            
-            # Basic metrics
-            analysis['metrics']['lines_of_code'] = len(code.strip().split('\n'))
-            analysis['metrics']['functions'] = len([node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)])
-            analysis['metrics']['loops'] = len([node for node in ast.walk(tree) if isinstance(node, (ast.For, ast.While))])
-            analysis['metrics']['conditionals'] = len([node for node in ast.walk(tree) if isinstance(node, ast.If)])
-            
-            # Cyclomatic complexity
-            analysis['metrics']['cyclomatic_complexity'] = self._calculate_cyclomatic_complexity(tree)
-            
+        except SyntaxError as e:
+            results = self._analyze_generic_code(code, code_lower)
+            results['issues'] = [f"Syntax error: {str(e)}"]
+            return results
+        
+        stats = self._collect_ast_stats(tree)
+        concepts = self._detect_concepts(code_lower)
+        
+        results = {
             # Pattern detection
-            analysis['patterns'] = self._detect_patterns(code)
-            analysis['algorithms'] = self._detect_algorithms(code)
-            analysis['data_structures'] = self._detect_data_structures(code)
+            'patterns': concepts['patterns'],
+            'algorithms': concepts['algorithms'],
+            'data_structures': concepts['data_structures'],
             
             # Complexity estimation
-            analysis['time_complexity'] = self._estimate_time_complexity(code, tree)
-            analysis['space_complexity'] = self._estimate_space_complexity(code, tree)
+            'time_complexity': self._estimate_time_complexity(code_lower, stats['max_loop_nesting']),
+            'space_complexity': self._estimate_space_complexity(code, stats['has_name_call']),
             
-            # Code quality issues
-            analysis['issues'] = self._detect_code_issues(code, tree)
-            analysis['suggestions'] = self._generate_suggestions(analysis)
+            'metrics': {
+                'lines_of_code': code.strip().count('\n') + 1,
+                'functions': len(stats['function_nodes']),
+                'loops': stats['loops'],
+                'conditionals': stats['conditionals'],
+                'cyclomatic_complexity': stats['cyclomatic_complexity']
+            },
             
-        except SyntaxError as e:
-            analysis['issues'].append(f"Syntax error: {str(e)}")
-            analysis = self._analyze_generic_code(code, analysis)
+            # Code quality issues
+            'issues': self._detect_code_issues(code, stats['function_nodes'], stats['max_if_nesting'])
+        }
+        results['suggestions'] = self._generate_suggestions(results)
         
-        return analysis
+        return results
 
-    def _analyze_generic_code(self, code: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze code without AST parsing"""
-        
-        # Basic metrics
-        lines = code.strip().split('\n')
-        analysis['metrics']['lines_of_code'] = len(lines)
-        
-        # Pattern detection using regex
-        analysis['patterns'] = self._detect_patterns(code)
-        analysis['algorithms'] = self._detect_algorithms(code)
-        analysis['data_structures'] = self._detect_data_structures(code)
-        
-        # Complexity estimation
-        analysis['time_complexity'] = self._estimate_time_complexity_regex(code)
-        analysis['space_complexity'] = self._estimate_space_complexity_regex(code)
-        
-        return analysis
+    def _analyze_generic_code(self, code: str, code_lower: str) -> Dict[str, Any]:
+        """Analyze code without AST parsing and return the fields it determines"""
+        concepts = self._detect_concepts(code_lower)
+        
+        return {
+            # Pattern detection using regex
+            'patterns': concepts['patterns'],
+            'algorithms': concepts['algorithms'],
+            'data_structures': concepts['data_structures'],
+            
+            # Complexity estimation
+            'time_complexity': self._estimate_time_complexity_regex(code_lower),
+            'space_complexity': self._estimate_space_complexity_regex(code_lower),
+            
+            # Basic metrics
+            'metrics': {'lines_of_code': code.strip().count('\n') + 1}
+        }
 
-    def _calculate_cyclomatic_complexity(self, tree: ast.AST) -> int:
-        """Calculate cyclomatic complexity"""
+    def _collect_ast_stats(self, tree: ast.AST) -> Dict[str, Any]:
+        """Gather node counts, cyclomatic complexity, nesting depths and function nodes in one tree walk"""
+        function_nodes: List[ast.FunctionDef] = []
+        loops = 0
+        conditionals = 0
         complexity = 1  # Base complexity
-        
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.If, ast.While, ast.For, ast.AsyncFor)):
+        has_name_call = False
+        max_loop_nesting = 0
+        max_if_nesting = 0
+        
+        # Breadth-first like ast.walk, carrying the enclosing loop/if depth of each node
+        todo: Deque[Tuple[ast.AST, int, int]] = deque([(tree, 0, 0)])
+        while todo:
+            node, loop_depth, if_depth = todo.popleft()
+            
+            if isinstance(node, ast.FunctionDef):
+                function_nodes.append(node)
+            elif isinstance(node, (ast.For, ast.While)):
+                loops += 1
+                complexity += 1
+                loop_depth += 1
+                max_loop_nesting = max(max_loop_nesting, loop_depth)
+            elif isinstance(node, ast.If):
+                conditionals += 1
                 complexity += 1
-            elif isinstance(node, ast.ExceptHandler):
+                if_depth += 1
+                max_if_nesting = max(max_if_nesting, if_depth)
+            elif isinstance(node, (ast.AsyncFor, ast.ExceptHandler)):
                 complexity += 1
             elif isinstance(node, ast.BoolOp):
                 complexity += len(node.values) - 1
-        
-        return complexity
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+                has_name_call = True
+            
+            # Inlined ast.iter_child_nodes: read the node class's field names directly
+            for field in node._fields:
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    for item in value:
+                        if isinstance(item, ast.AST):
+                            todo.append((item, loop_depth, if_depth))
+                elif isinstance(value, ast.AST):
+                    todo.append((value, loop_depth, if_depth))
+        
+        return {
+            'function_nodes': function_nodes,
+            'loops': loops,
+            'conditionals': conditionals,
+            'cyclomatic_complexity': complexity,
+            'has_name_call': has_name_call,
+            'max_loop_nesting': max_loop_nesting,
+            'max_if_nesting': max_if_nesting
+        }
 
-    def _detect_patterns(self, code: str) -> List[str]:
-        """Detect coding patterns in the code"""
-        patterns = []
-        code_lower = code.lower()
+    def _detect_concepts(self, code_lower: str) -> Dict[str, List[str]]:
+        """Detect patterns, algorithms and data structures, reusing results for identical code"""
+        def detect() -> Dict[str, List[str]]:
+            categories = self._detect_concept_categories(code_lower)
+            return {
+                'patterns': self._detect_patterns(code_lower),
+                'algorithms': categories['algorithms'],
+                'data_structures': categories['data_structures']
+            }
         
-        # Common patterns
-        pattern_checks = {
-            'two_pointers': ['left', 'right', 'start', 'end', 'i', 'j'],
-            'sliding_window': ['window', 'left', 'right', 'expand', 'contract'],
-            'fast_slow_pointers': ['slow', 'fast', 'tortoise', 'hare'],
-            'merge_intervals': ['merge', 'interval', 'overlap', 'start', 'end'],
-            'cyclic_sort': ['cycle', 'sort', 'position', 'place'],
-            'tree_dfs': ['dfs', 'depth', 'recursive', 'left', 'right'],
-            'tree_bfs': ['bfs', 'breadth', 'level', 'queue'],
-            'topological_sort': ['topological', 'indegree', 'outdegree', 'kahn'],
-            'binary_search': ['binary', 'search', 'mid', 'left', 'right'],
-            'modified_binary_search': ['rotated', 'pivot', 'search', 'sorted']
+        return self._concept_cache.get_or_compute(content_key(code_lower), detect)
+    
+    def _detect_concept_categories(self, code_lower: str) -> Dict[str, List[str]]:
+        """Match the algorithm and data-structure tables together, testing each shared needle once"""
+        if self._pattern_databases:
+            return {table: self._matching_categories(table, code_lower) for table in CONCEPT_TABLES}
+        
+        literal_owners, pair_owners, regexes = self._concept_index
+        found: Set[Tuple[str, str]] = set()
+        
+        # Skip a needle once every category it would prove is already found
+        for literal, owners in literal_owners.items():
+            if not owners <= found and literal in code_lower:
+                found |= owners
+        for (first, second), owners in pair_owners.items():
+            if not owners <= found and _appears_in_order_on_one_line(code_lower, first, second):
+                found |= owners
+        for owner, regex in regexes.items():
+            if owner not in found and regex.search(code_lower):
+                found.add(owner)
+        
+        return {
+            table: [category for category in self._matchers[table] if (table, category) in found]
+            for table in CONCEPT_TABLES
         }
-        
-        for pattern, keywords in pattern_checks.items():
-            if any(keyword in code_lower for keyword in keywords):
-                patterns.append(pattern)
-        
-        return patterns
 
-    def _detect_algorithms(self, code: str) -> List[str]:
-        """Detect algorithms used in the code"""
-        algorithms = []
-        
-        for algorithm, patterns in self.algorithm_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, code, re.IGNORECASE):
-                    algorithms.append(algorithm)
+    def _detect_patterns(self, code_lower: str) -> List[str]:
+        """Detect coding patterns in the lowercased code"""
+        if self._keyword_automaton is not None:
+            # Single pass over the code for every keyword at once
+            found: Set[str] = set()
+            for _, hinted_patterns in self._keyword_automaton.iter(code_lower):
+                found.update(hinted_patterns)
+                if len(found) == len(self.pattern_checks):
                     break
+            return [pattern for pattern in self.pattern_checks if pattern in found]
         
-        return algorithms
+        found = set()
+        for keyword, hinted_patterns in self._keyword_patterns.items():
+            if not hinted_patterns <= found and keyword in code_lower:
+                found |= hinted_patterns
+        return [pattern for pattern in self.pattern_checks if pattern in found]
 
-    def _detect_data_structures(self, code: str) -> List[str]:
-        """Detect data structures used in the code"""
-        data_structures = []
-        
-        for ds, patterns in self.data_structure_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, code, re.IGNORECASE):
-                    data_structures.append(ds)
-                    break
-        
-        return data_structures
+    def _detect_algorithms(self, code_lower: str) -> List[str]:
+        """Detect algorithms used in the lowercased code"""
+        return self._matching_categories('algorithms', code_lower)
 
-    def _estimate_time_complexity(self, code: str, tree: ast.AST) -> str:
-        """Estimate time complexity from AST"""
-        # Count nested loops
-        max_nesting = 0
-        current_nesting = 0
-        
-        class LoopCounter(ast.NodeVisitor):
-            def __init__(self):
-                self.max_nesting = 0
-                self.current_nesting = 0
-            
-            def visit_For(self, node):
-                self.current_nesting += 1
-                self.max_nesting = max(self.max_nesting, self.current_nesting)
-                self.generic_visit(node)
-                self.current_nesting -= 1
-            
-            def visit_While(self, node):
-                self.current_nesting += 1
-                self.max_nesting = max(self.max_nesting, self.current_nesting)
-                self.generic_visit(node)
-                self.current_nesting -= 1
-        
-        counter = LoopCounter()
-        counter.visit(tree)
-        
+    def _detect_data_structures(self, code_lower: str) -> List[str]:
+        """Detect data structures used in the lowercased code"""
+        return self._matching_categories('data_structures', code_lower)
+
+    def _estimate_time_complexity(self, code_lower: str, max_loop_nesting: int) -> str:
+        """Estimate time complexity from the deepest loop nesting in the AST"""
         # Estimate based on patterns
-        if counter.max_nesting == 0:
+        if max_loop_nesting == 0:
             return "O(1)"
-        elif counter.max_nesting == 1:
-            if any(pattern in code.lower() for pattern in ['sort', 'heappush', 'heappop']):
+        elif max_loop_nesting == 1:
+            if any(pattern in code_lower for pattern in ['sort', 'heappush', 'heappop']):
                 return "O(n log n)"
             else:
                 return "O(n)"
-        elif counter.max_nesting == 2:
+        elif max_loop_nesting == 2:
             return "O(n^2)"
         else:
-            return f"O(n^{counter.max_nesting})"
+            return f"O(n^{max_loop_nesting})"
 
-    def _estimate_space_complexity(self, code: str, tree: ast.AST) -> str:
-        """Estimate space complexity from AST"""
-        # Check for recursive calls
-        has_recursion = any(isinstance(node, ast.Call) and 
-                          isinstance(node.func, ast.Name) for node in ast.walk(tree))
-        
+    def _estimate_space_complexity(self, code: str, has_recursion: bool) -> str:
+        """Estimate space complexity from AST statistics"""
         # Check for data structures
         if 'dict' in code or 'set' in code or 'list' in code:
             return "O(n)"
@@ -259,60 +591,39 @@ class CodeAnalyzer:
         else:
             return "O(1)"
 
-    def _estimate_time_complexity_regex(self, code: str) -> str:
+    def _estimate_time_complexity_regex(self, code_lower: str) -> str:
         """Estimate time complexity using regex patterns"""
-        for complexity, patterns in self.complexity_indicators['time'].items():
-            for pattern in patterns:
-                if re.search(pattern, code, re.IGNORECASE):
-                    return complexity
-        return "O(n)"  # Default assumption
+        matched = self._matching_categories('time', code_lower, first_only=True)
+        return matched[0] if matched else "O(n)"  # Default assumption
 
-    def _estimate_space_complexity_regex(self, code: str) -> str:
+    def _estimate_space_complexity_regex(self, code_lower: str) -> str:
         """Estimate space complexity using regex patterns"""
-        for complexity, patterns in self.complexity_indicators['space'].items():
-            for pattern in patterns:
-                if re.search(pattern, code, re.IGNORECASE):
-                    return complexity
-        return "O(1)"  # Default assumption
+        matched = self._matching_categories('space', code_lower, first_only=True)
+        return matched[0] if matched else "O(1)"  # Default assumption
 
-    def _detect_code_issues(self, code: str, tree: ast.AST) -> List[str]:
+    def _detect_code_issues(self, code: str, function_nodes: List[ast.FunctionDef], max_if_nesting: int) -> List[str]:
         """Detect potential code quality issues"""
-        issues = []
+        issues: List[str] = []
         
         # Check for long functions
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                func_lines = len(ast.get_source_segment(code, node).split('\n'))
-                if func_lines > 50:
-                    issues.append(f"Function '{node.name}' is too long ({func_lines} lines)")
+        for node in function_nodes:
+            func_lines = (node.end_lineno or node.lineno) - node.lineno + 1
+            if func_lines > 50:
+                issues.append(f"Function '{node.name}' is too long ({func_lines} lines)")
         
         # Check for deep nesting
-        class NestingChecker(ast.NodeVisitor):
-            def __init__(self):
-                self.max_nesting = 0
-                self.current_nesting = 0
-            
-            def visit_If(self, node):
-                self.current_nesting += 1
-                self.max_nesting = max(self.max_nesting, self.current_nesting)
-                self.generic_visit(node)
-                self.current_nesting -= 1
-        
-        checker = NestingChecker()
-        checker.visit(tree)
-        
-        if checker.max_nesting > 4:
-            issues.append(f"Deep nesting detected (level {checker.max_nesting})")
+        if max_if_nesting > 4:
+            issues.append(f"Deep nesting detected (level {max_if_nesting})")
         
         # Check for variable naming
-        if re.search(r'\b[a-z]\b', code):
+        if self._single_letter_name_re.search(code):
             issues.append("Single letter variable names detected")
         
         return issues
 
     def _generate_suggestions(self, analysis: Dict[str, Any]) -> List[str]:
         """Generate improvement suggestions"""
-        suggestions = []
+        suggestions: List[str] = []
         
         # Complexity suggestions
         if analysis['time_complexity'] == 'O(n^2)':
@@ -363,3 +674,5 @@ class CodeAnalyzer:
         score += len(analysis['algorithms']) * 3
         
         return min(100, max(0, score))
+
+CodeAnalyzer._compile_shared_tables()
@@ -7,22 +7,244 @@ user progress, and learning outcomes. It integrates with the LLM-enhanced
 code analyzer to provide data-driven learning insights.
 """
 
+import bisect
+import itertools
 import json
+import math
+import queue
+import sys
+import threading
+import time
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Deque, Dict, FrozenSet, List, Any, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
-from collections import defaultdict, Counter
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import DBSCAN
+from collections import defaultdict, deque
+from itertools import takewhile
 
+try:
+    # Optional accelerator (pip install numba); the numeric kernels below run as plain Python without it
+    import numba
+except ImportError:
+    numba = None
+
+from .result_cache import ResultCache
 from models.database import db, User, Submission, LearningPath, KnowledgeGap, ProgressMetric
 
 
+def _trend_slope(values: np.ndarray) -> float:
+    """Least-squares slope of values against their index; equals np.polyfit(x, values, 1)[0]"""
+    n = values.size
+    centered_x = np.arange(n) - (n - 1) / 2
+    return np.dot(centered_x, values) / (n * (n * n - 1) / 12)
+
+
+def _jit(kernel):
+    """Compile a numeric kernel with numba when it is installed"""
+    if numba is None:
+        return kernel
+    return numba.njit(cache=True)(kernel)
+
+
+@_jit
+def _consistency_kernel(intervals):
+    # Lower standard deviation indicates higher consistency
+    return min(1.0 / (1.0 + np.std(intervals)), 1.0)
+
+
+# Below this many values, plain Python arithmetic beats numpy's per-call overhead
+SMALL_SAMPLE_SIZE = 32
+
+
+def _small_consistency(intervals: List[int]) -> float:
+    """Pure-Python _consistency_kernel for short histories without numba"""
+    mean = sum(intervals) / len(intervals)
+    std = math.sqrt(sum((x - mean) ** 2 for x in intervals) / len(intervals))
+    return min(1.0 / (1.0 + std), 1.0)
+
+
+# Success probability factors, in the order features are passed to the kernel:
+# learning consistency, improvement rate and total sessions
+SUCCESS_FACTOR_THRESHOLDS = np.array([0.7, 0.1, 20.0])
+SUCCESS_FACTOR_WEIGHTS = np.array([0.2, 0.15, 0.1])
+
+
+@_jit
+def _success_probability_kernel(features, difficulty_adjustment):
+    # Each factor adds its weight times whether it clears its threshold; summed
+    # in factor order so results match the original chain of ifs exactly
+    probability = 0.5
+    for i in range(features.size):
+        probability += SUCCESS_FACTOR_WEIGHTS[i] * (features[i] > SUCCESS_FACTOR_THRESHOLDS[i])
+    probability += difficulty_adjustment
+    return float(max(0.1, min(0.95, probability)))
+
+
+# Success probability shift per learning path difficulty (others: 0)
+DIFFICULTY_ADJUSTMENTS = {'advanced': -0.15, 'beginner': 0.1}
+
+if numba is not None:
+    # Compile (or load from the on-disk cache) now rather than on the first request
+    _consistency_kernel(np.zeros(2, dtype=np.int64))
+    _success_probability_kernel(np.zeros(3), 0.0)
+
+
+def _recent_mean(values: np.ndarray, window: int) -> float:
+    """Mean of the newest `window` values (all of them if there are fewer)"""
+    recent = values[-window:]
+    return recent.sum() / recent.size
+
+
+class SessionFeatures(NamedTuple):
+    """Analysis fields read by several tracking steps, extracted once per session"""
+    complexity_score: float
+    quality_score: float
+    time_complexity: Optional[str]
+    patterns: FrozenSet[str]
+    algorithms: FrozenSet[str]
+    patterns_listed: int  # len() of the raw patterns list, duplicates included
+
+
+def _extract_features(analysis_results: Dict[str, Any]) -> SessionFeatures:
+    patterns = analysis_results.get('patterns', [])
+    return SessionFeatures(
+        complexity_score=analysis_results.get('complexity_score', 0),
+        quality_score=analysis_results.get('quality_score', 0),
+        time_complexity=analysis_results.get('time_complexity'),
+        patterns=frozenset(patterns),
+        algorithms=frozenset(analysis_results.get('algorithms', [])),
+        patterns_listed=len(patterns)
+    )
+
+
+# Time complexities that count as demonstrating algorithmic optimization
+OPTIMIZED_TIME_COMPLEXITIES = frozenset({'O(log n)', 'O(n log n)'})
+
+# (predicate over session features and recommendations, tip), in display order
+TIP_RULES: List[Tuple[Callable[[SessionFeatures, Dict[str, Any]], bool], str]] = [
+    # Tips based on complexity
+    (lambda f, r: f.time_complexity == 'O(n^2)',
+     "Focus on learning optimization techniques like hash tables or two pointers"),
+    # Tips based on patterns
+    (lambda f, r: 'array' in f.patterns and 'two_pointers' not in f.patterns,
+     "Practice two pointers technique to optimize array problems"),
+    # Tips based on quality
+    (lambda f, r: f.quality_score < 6,
+     "Focus on code readability and proper naming conventions"),
+    # Tips based on recommendations
+    (lambda f, r: any(gap['concept'] == 'recursion' for gap in r.get('knowledge_gaps') or ()),
+     "Start with simple recursive problems before tackling complex ones"),
+]
+
+
+# Disambiguates sessions started within the same nanosecond tick
+_session_counter = itertools.count()
+
+# Anonymous analytics are written off the request path by a daemon thread;
+# when the writer falls this far behind, new records are dropped
+ANONYMOUS_ANALYTICS_BACKLOG = 10_000
+ANONYMOUS_ANALYTICS_BATCH = 100
+_anonymous_analytics = queue.Queue(maxsize=ANONYMOUS_ANALYTICS_BACKLOG)
+_anonymous_writer_lock = threading.Lock()
+_anonymous_writer = None
+
+
+def _write_anonymous_analytics():
+    """Drain queued anonymous analytics to stdout, one write per batch"""
+    while True:
+        batch = [_anonymous_analytics.get()]
+        while len(batch) < ANONYMOUS_ANALYTICS_BATCH:
+            try:
+                batch.append(_anonymous_analytics.get_nowait())
+            except queue.Empty:
+                break
+        
+        sys.stdout.write(''.join(f"Anonymous analytics: {data}\n" for data in batch))
+        sys.stdout.flush()
+
+
+def _ensure_anonymous_writer():
+    global _anonymous_writer
+    if _anonymous_writer is not None:
+        return
+    
+    with _anonymous_writer_lock:
+        if _anonymous_writer is None:
+            _anonymous_writer = threading.Thread(
+                target=_write_anonymous_analytics, name='anonymous-analytics', daemon=True
+            )
+            _anonymous_writer.start()
+
+
+# (min average quality, min average complexity) needed to leave each level
+BEGINNER_TO_INTERMEDIATE = (7, 6)
+INTERMEDIATE_TO_ADVANCED = (8.5, 8)
+MIN_PROGRESSION_SAMPLES = 3
+
+# Names stay Python strings (object) so a long history costs a pointer per row, not 100 chars
+METRIC_TABLE_DTYPE = np.dtype([('name', object), ('value', np.float64), ('recorded_at', 'datetime64[us]')])
+METRIC_BATCH_SIZE = 1000
+
+
+def _metric_table(metrics: List[ProgressMetric]) -> np.ndarray:
+    """Columnar (name, value, recorded_at) view of progress metrics for masked reductions"""
+    return np.array(
+        [(m.metric_name, m.metric_value, m.recorded_at) for m in metrics],
+        dtype=METRIC_TABLE_DTYPE
+    )
+
+
+def _load_metric_table(*criteria) -> np.ndarray:
+    """Stream the matching metrics, oldest first, into a metric table.
+
+    Rows are fetched as plain columns in batches of METRIC_BATCH_SIZE, so no
+    ORM objects are built and at most one batch of row tuples is alive at once.
+    """
+    result = db.session.execute(
+        db.select(ProgressMetric.metric_name, ProgressMetric.metric_value, ProgressMetric.recorded_at)
+        .where(*criteria)
+        .order_by(ProgressMetric.recorded_at.asc())
+        .execution_options(yield_per=METRIC_BATCH_SIZE)
+    )
+    batches = [
+        np.array([tuple(row) for row in batch], dtype=METRIC_TABLE_DTYPE)
+        for batch in result.partitions()
+    ]
+    if not batches:
+        return np.empty(0, dtype=METRIC_TABLE_DTYPE)
+    return np.concatenate(batches)
+
+
+def _metrics_version(user_id: int) -> Optional[int]:
+    """Newest progress metric id for a user; changes whenever a metric is recorded"""
+    return db.session.query(db.func.max(ProgressMetric.id))\
+        .filter(ProgressMetric.user_id == user_id)\
+        .scalar()
+
+
+def _whole_days(deltas: np.ndarray) -> np.ndarray:
+    """Whole days in each timedelta64, rounded down like timedelta.days"""
+    return deltas // np.timedelta64(1, 'D')
+
+
+def _mean_change(before: np.ndarray, after: np.ndarray, metric_name: str) -> float:
+    """Change in a metric's mean between two metric tables; 0.0 if either side lacks it"""
+    before_values = before['value'][before['name'] == metric_name]
+    after_values = after['value'][after['name'] == metric_name]
+    if not before_values.size or not after_values.size:
+        return 0.0
+    return after_values.mean() - before_values.mean()
+
+
 class EnhancedLearningTracker:
     def __init__(self):
         self.learning_analytics = LearningAnalytics()
         self.recommendation_tracker = RecommendationTracker()
         self.progress_predictor = ProgressPredictor()
+        # The tracker is shared across request threads; each queues its own metrics
+        self._local = threading.local()
+        # Keyed on each user's newest metric id, so new activity misses naturally;
+        # the TTL bounds drift of the time-windowed parts of the results
+        self._analytics_cache = ResultCache(maxsize=512, ttl=60)
         
     def track_code_analysis_session(self, user_id: Optional[int], submission_id: int, 
                                   analysis_results: Dict[str, Any], 
@@ -34,33 +256,43 @@ class EnhancedLearningTracker:
         - User interaction with recommendations
         - Learning outcomes
         """
+        now = datetime.utcnow()
         session_data = {
-            'session_id': f"session_{datetime.utcnow().isoformat()}",
+            'session_id': f"session_{time.time_ns()}_{next(_session_counter)}",
             'user_id': user_id,
             'submission_id': submission_id,
-            'timestamp': datetime.utcnow(),
+            'timestamp': now,
             'analysis_results': analysis_results,
             'recommendations': recommendations,
             'tracking_metrics': {}
         }
         
+        features = _extract_features(analysis_results)
+        
         # Track recommendation effectiveness
         if user_id:
-            self._track_recommendation_relevance(user_id, recommendations)
-            self._update_learning_progress(user_id, analysis_results)
-            self._track_skill_development(user_id, analysis_results)
+            self._track_recommendation_relevance(user_id, recommendations, now)
+            self._update_learning_progress(user_id, features, now)
+            self._track_skill_development(user_id, features, now)
         
         # Track anonymous user patterns
         else:
-            self._track_anonymous_patterns(analysis_results, recommendations)
+            self._track_anonymous_patterns(analysis_results, recommendations, now)
         
         # Generate learning insights
-        learning_insights = self._generate_learning_insights(analysis_results, recommendations)
+        learning_insights = self._generate_learning_insights(features, recommendations)
         session_data['learning_insights'] = learning_insights
         
         # Store session data
         self._store_session_data(session_data)
         
+        # Write every metric recorded during the session in one round-trip
+        self._flush_metrics()
+        
+        # Update skill level if significant improvement detected
+        if user_id:
+            self._evaluate_skill_level_progression(user_id, now)
+        
         return session_data
     
     def get_recommendation_effectiveness(self, user_id: int, 
@@ -74,7 +306,10 @@ class EnhancedLearningTracker:
         """
         Get detailed learning trajectory analysis for a user
         """
-        return self.learning_analytics.analyze_learning_trajectory(user_id)
+        return self._analytics_cache.get_or_compute(
+            ('trajectory', user_id, _metrics_version(user_id)),
+            lambda: self.learning_analytics.analyze_learning_trajectory(user_id)
+        )
     
     def predict_learning_outcomes(self, user_id: int, 
                                  proposed_learning_path: Dict[str, Any]) -> Dict[str, Any]:
@@ -88,66 +323,64 @@ class EnhancedLearningTracker:
         Get comprehensive learning analytics
         """
         if user_id:
-            return self._get_user_analytics(user_id)
+            return self._analytics_cache.get_or_compute(
+                ('user_analytics', user_id, _metrics_version(user_id)),
+                lambda: self._get_user_analytics(user_id)
+            )
         else:
             return self._get_system_analytics()
     
-    def _track_recommendation_relevance(self, user_id: int, recommendations: Dict[str, Any]):
+    def _track_recommendation_relevance(self, user_id: int, recommendations: Dict[str, Any],
+                                        generated_at: datetime):
         """Track how relevant recommendations are to user's current skill level"""
         # Store recommendation for later effectiveness analysis
         recommendation_record = {
             'user_id': user_id,
             'recommendations': recommendations,
-            'generated_at': datetime.utcnow(),
+            'generated_at': generated_at,
             'type': 'code_analysis_recommendation'
         }
         
         self.recommendation_tracker.store_recommendation(recommendation_record)
     
-    def _update_learning_progress(self, user_id: int, analysis_results: Dict[str, Any]):
+    def _update_learning_progress(self, user_id: int, features: SessionFeatures,
+                                  now: Optional[datetime] = None):
         """Update user's learning progress based on code analysis"""
         
-        # Extract skill indicators from analysis
-        complexity_score = analysis_results.get('complexity_score', 0)
-        quality_score = analysis_results.get('quality_score', 0)
-        patterns_used = analysis_results.get('patterns', [])
-        algorithms_used = analysis_results.get('algorithms', [])
-        
         # Update progress metrics
-        self._record_progress_metric(user_id, 'complexity_handling', complexity_score)
-        self._record_progress_metric(user_id, 'code_quality', quality_score)
-        self._record_progress_metric(user_id, 'pattern_diversity', len(set(patterns_used)))
-        self._record_progress_metric(user_id, 'algorithm_diversity', len(set(algorithms_used)))
-        
-        # Update skill level if significant improvement detected
-        self._evaluate_skill_level_progression(user_id)
+        self._record_progress_metric(user_id, 'complexity_handling', features.complexity_score, now=now)
+        self._record_progress_metric(user_id, 'code_quality', features.quality_score, now=now)
+        self._record_progress_metric(user_id, 'pattern_diversity', len(features.patterns), now=now)
+        self._record_progress_metric(user_id, 'algorithm_diversity', len(features.algorithms), now=now)
     
-    def _track_skill_development(self, user_id: int, analysis_results: Dict[str, Any]):
+    def _track_skill_development(self, user_id: int, features: SessionFeatures,
+                                 now: Optional[datetime] = None):
         """Track development of specific programming skills"""
         
         skills_demonstrated = []
         
         # Analyze demonstrated skills
-        if analysis_results.get('time_complexity') in ['O(log n)', 'O(n log n)']:
+        if features.time_complexity in OPTIMIZED_TIME_COMPLEXITIES:
             skills_demonstrated.append('algorithmic_optimization')
         
-        if analysis_results.get('quality_score', 0) > 8:
+        if features.quality_score > 8:
             skills_demonstrated.append('clean_code')
         
-        if len(analysis_results.get('patterns', [])) > 2:
+        if features.patterns_listed > 2:
             skills_demonstrated.append('pattern_recognition')
         
         # Record demonstrated skills
         for skill in skills_demonstrated:
-            self._record_progress_metric(user_id, f'skill_{skill}', 1, 'count')
+            self._record_progress_metric(user_id, f'skill_{skill}', 1, 'count', now=now)
     
     def _track_anonymous_patterns(self, analysis_results: Dict[str, Any], 
-                                 recommendations: Dict[str, Any]):
+                                 recommendations: Dict[str, Any],
+                                 now: Optional[datetime] = None):
         """Track patterns for anonymous users to improve system recommendations"""
         
         # Store anonymous patterns for system improvement
         anonymous_data = {
-            'timestamp': datetime.utcnow(),
+            'timestamp': now or datetime.utcnow(),
             'complexity_score': analysis_results.get('complexity_score', 0),
             'quality_score': analysis_results.get('quality_score', 0),
             'patterns_count': len(analysis_results.get('patterns', [])),
@@ -159,7 +392,7 @@ class EnhancedLearningTracker:
         # This could be stored in a separate analytics table for system improvement
         self._store_anonymous_analytics(anonymous_data)
     
-    def _generate_learning_insights(self, analysis_results: Dict[str, Any], 
+    def _generate_learning_insights(self, features: SessionFeatures, 
                                    recommendations: Dict[str, Any]) -> Dict[str, Any]:
         """Generate actionable learning insights from analysis and recommendations"""
         
@@ -172,111 +405,118 @@ class EnhancedLearningTracker:
         }
         
         # Identify strengths
-        if analysis_results.get('quality_score', 0) > 7:
+        if features.quality_score > 7:
             insights['strengths_identified'].append('Good code quality and structure')
         
-        if len(analysis_results.get('patterns', [])) > 1:
+        if features.patterns_listed > 1:
             insights['strengths_identified'].append('Demonstrates multiple programming patterns')
         
         # Identify areas for improvement
-        knowledge_gaps = recommendations.get('knowledge_gaps', [])
-        for gap in knowledge_gaps:
-            insights['areas_for_improvement'].append(gap.get('reason', 'General improvement needed'))
+        insights['areas_for_improvement'] = [
+            gap.get('reason', 'General improvement needed')
+            for gap in recommendations.get('knowledge_gaps', [])
+        ]
         
         # Set learning priorities
-        concepts_to_learn = recommendations.get('concepts_to_learn', [])
-        high_priority_concepts = [c for c in concepts_to_learn if c.get('priority') == 'high']
-        insights['learning_priorities'] = [c['concept'] for c in high_priority_concepts]
+        insights['learning_priorities'] = [
+            c['concept'] for c in recommendations.get('concepts_to_learn', [])
+            if c.get('priority') == 'high'
+        ]
         
         # Calculate learning time
         insights['estimated_learning_time'] = recommendations.get('estimated_study_time', 0)
         
         # Generate personalized tips
-        insights['personalized_tips'] = self._generate_personalized_tips(analysis_results, recommendations)
+        insights['personalized_tips'] = self._generate_personalized_tips(features, recommendations)
         
         return insights
     
-    def _generate_personalized_tips(self, analysis_results: Dict[str, Any], 
+    def _generate_personalized_tips(self, features: SessionFeatures, 
                                    recommendations: Dict[str, Any]) -> List[str]:
         """Generate personalized learning tips"""
-        tips = []
-        
-        # Tips based on complexity
-        if analysis_results.get('time_complexity') == 'O(n^2)':
-            tips.append("Focus on learning optimization techniques like hash tables or two pointers")
-        
-        # Tips based on patterns
-        patterns = analysis_results.get('patterns', [])
-        if 'array' in patterns and 'two_pointers' not in patterns:
-            tips.append("Practice two pointers technique to optimize array problems")
-        
-        # Tips based on quality
-        if analysis_results.get('quality_score', 0) < 6:
-            tips.append("Focus on code readability and proper naming conventions")
-        
-        # Tips based on recommendations
-        if recommendations.get('knowledge_gaps'):
-            gap_concepts = [gap['concept'] for gap in recommendations['knowledge_gaps']]
-            if 'recursion' in gap_concepts:
-                tips.append("Start with simple recursive problems before tackling complex ones")
-        
-        return tips
+        return [tip for applies, tip in TIP_RULES if applies(features, recommendations)]
     
     def _record_progress_metric(self, user_id: int, metric_name: str, 
-                               metric_value: float, metric_type: str = 'score'):
-        """Record a progress metric for a user"""
-        
-        metric = ProgressMetric(
-            user_id=user_id,
-            metric_name=metric_name,
-            metric_value=metric_value,
-            metric_type=metric_type,
-            recorded_at=datetime.utcnow()
-        )
+                               metric_value: float, metric_type: str = 'score',
+                               now: Optional[datetime] = None):
+        """Queue a progress metric for a user; written by _flush_metrics"""
+        
+        self._pending_metrics.append({
+            'user_id': user_id,
+            'metric_name': metric_name,
+            'metric_value': metric_value,
+            'metric_type': metric_type,
+            'recorded_at': now or datetime.utcnow()
+        })
+    
+    @property
+    def _pending_metrics(self) -> List[Dict[str, Any]]:
+        """Progress metric rows queued by the current thread"""
+        pending = getattr(self._local, 'pending_metrics', None)
+        if pending is None:
+            pending = self._local.pending_metrics = []
+        return pending
+    
+    def _flush_metrics(self):
+        """Insert all queued progress metrics and commit once"""
+        rows = self._pending_metrics
+        if not rows:
+            return
+        
+        self._local.pending_metrics = []
         
         try:
-            db.session.add(metric)
+            db.session.bulk_insert_mappings(ProgressMetric, rows)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
-            print(f"Error recording progress metric: {e}")
+            print(f"Error recording progress metrics: {e}")
     
-    def _evaluate_skill_level_progression(self, user_id: int):
+    def _evaluate_skill_level_progression(self, user_id: int, now: Optional[datetime] = None):
         """Evaluate if user should progress to next skill level"""
         
-        # Get recent metrics
-        recent_metrics = ProgressMetric.query.filter_by(user_id=user_id)\
-            .filter(ProgressMetric.recorded_at >= datetime.utcnow() - timedelta(days=30))\
-            .all()
+        # Average the recent scores in the database instead of loading every row
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=30)
+        quality = db.case((ProgressMetric.metric_name == 'code_quality', ProgressMetric.metric_value))
+        complexity = db.case((ProgressMetric.metric_name == 'complexity_handling', ProgressMetric.metric_value))
+        quality_count, avg_quality, complexity_count, avg_complexity = db.session.query(
+            db.func.count(quality), db.func.avg(quality),
+            db.func.count(complexity), db.func.avg(complexity)
+        ).filter(
+            ProgressMetric.user_id == user_id,
+            ProgressMetric.recorded_at >= cutoff
+        ).one()
+        
+        # Too few samples, or below the lowest promotion bar: skip the user lookup
+        if quality_count < MIN_PROGRESSION_SAMPLES or complexity_count < MIN_PROGRESSION_SAMPLES:
+            return
+        if not self._meets_threshold(BEGINNER_TO_INTERMEDIATE, avg_quality, avg_complexity):
+            return
         
-        if not recent_metrics:
+        # Check for skill level progression
+        user = db.session.get(User, user_id)
+        if not user:
             return
         
-        # Calculate average scores
-        quality_scores = [m.metric_value for m in recent_metrics if m.metric_name == 'code_quality']
-        complexity_scores = [m.metric_value for m in recent_metrics if m.metric_name == 'complexity_handling']
+        current_level = user.skill_level
         
-        if quality_scores and complexity_scores:
-            avg_quality = np.mean(quality_scores)
-            avg_complexity = np.mean(complexity_scores)
-            
-            # Check for skill level progression
-            user = User.query.get(user_id)
-            if user:
-                current_level = user.skill_level
-                
-                if current_level == 'beginner' and avg_quality > 7 and avg_complexity > 6:
-                    user.skill_level = 'intermediate'
-                    self._record_progress_metric(user_id, 'skill_level_progression', 2, 'level')
-                elif current_level == 'intermediate' and avg_quality > 8.5 and avg_complexity > 8:
-                    user.skill_level = 'advanced'
-                    self._record_progress_metric(user_id, 'skill_level_progression', 3, 'level')
-                
-                try:
-                    db.session.commit()
-                except Exception as e:
-                    db.session.rollback()
-                    print(f"Error updating skill level: {e}")
+        if current_level == 'beginner' and self._meets_threshold(BEGINNER_TO_INTERMEDIATE, avg_quality, avg_complexity):
+            user.skill_level = 'intermediate'
+            self._record_progress_metric(user_id, 'skill_level_progression', 2, 'level', now=now)
+        elif current_level == 'intermediate' and self._meets_threshold(INTERMEDIATE_TO_ADVANCED, avg_quality, avg_complexity):
+            user.skill_level = 'advanced'
+            self._record_progress_metric(user_id, 'skill_level_progression', 3, 'level', now=now)
+        else:
+            return
+        
+        # Commits the new skill level together with its progression metric
+        self._flush_metrics()
+    
+    @staticmethod
+    def _meets_threshold(threshold: Tuple[float, float], avg_quality: float, avg_complexity: float) -> bool:
+        min_quality, min_complexity = threshold
+        return avg_quality > min_quality and avg_complexity > min_complexity
     
     def _store_session_data(self, session_data: Dict[str, Any]):
         """Store complete session data for analytics"""
@@ -302,25 +542,30 @@ class EnhancedLearningTracker:
                 user_id, 
                 'learning_session', 
                 1, 
-                'count'
+                'count',
+                now=session_data['timestamp']
             )
     
     def _store_anonymous_analytics(self, anonymous_data: Dict[str, Any]):
         """Store anonymous user analytics for system improvement"""
         # This would typically go to a separate analytics storage
-        # For now, we'll just log it
-        print(f"Anonymous analytics: {anonymous_data}")
+        # For now, we'll just log it, without blocking the request on stdout
+        _ensure_anonymous_writer()
+        try:
+            _anonymous_analytics.put_nowait(anonymous_data)
+        except queue.Full:
+            pass
     
     def _get_user_analytics(self, user_id: int) -> Dict[str, Any]:
         """Get comprehensive analytics for a specific user"""
         
         # Get user info
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return {'error': 'User not found'}
         
         # Get learning trajectory
-        trajectory = self.learning_analytics.analyze_learning_trajectory(user_id)
+        trajectory = self.get_learning_trajectory(user_id)
         
         # Get recommendation effectiveness
         recommendation_effectiveness = self.recommendation_tracker.analyze_effectiveness(user_id, 30)
@@ -328,12 +573,17 @@ class EnhancedLearningTracker:
         # Get recent progress
         recent_progress = self._get_recent_progress(user_id, 30)
         
+        # Count in the database rather than loading every submission
+        total_submissions = db.session.query(db.func.count(Submission.id))\
+            .filter(Submission.user_id == user_id)\
+            .scalar()
+        
         return {
             'user_profile': {
                 'username': user.username,
                 'skill_level': user.skill_level,
                 'member_since': user.created_at.isoformat(),
-                'total_submissions': len(user.submissions)
+                'total_submissions': total_submissions
             },
             'learning_trajectory': trajectory,
             'recommendation_effectiveness': recommendation_effectiveness,
@@ -373,17 +623,20 @@ class EnhancedLearningTracker:
         
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        recent_metrics = ProgressMetric.query.filter_by(user_id=user_id)\
-            .filter(ProgressMetric.recorded_at >= cutoff_date)\
-            .order_by(ProgressMetric.recorded_at.desc())\
-            .all()
+        # Plain column tuples skip building an ORM object per row
+        recent_metrics = db.session.query(
+            ProgressMetric.metric_name, ProgressMetric.metric_value, ProgressMetric.recorded_at
+        ).filter(
+            ProgressMetric.user_id == user_id,
+            ProgressMetric.recorded_at >= cutoff_date
+        ).order_by(ProgressMetric.recorded_at.desc()).all()
         
         # Group metrics by type
         metrics_by_type = defaultdict(list)
-        for metric in recent_metrics:
-            metrics_by_type[metric.metric_name].append({
-                'value': metric.metric_value,
-                'recorded_at': metric.recorded_at.isoformat()
+        for metric_name, metric_value, recorded_at in recent_metrics:
+            metrics_by_type[metric_name].append({
+                'value': metric_value,
+                'recorded_at': recorded_at.isoformat()
             })
         
         return dict(metrics_by_type)
@@ -391,16 +644,18 @@ class EnhancedLearningTracker:
     def _get_language_distribution(self) -> Dict[str, int]:
         """Get distribution of programming languages used"""
         
-        submissions = Submission.query.all()
-        language_counts = Counter(sub.language for sub in submissions)
+        language_counts = db.session.query(Submission.language, db.func.count(Submission.id))\
+            .group_by(Submission.language)\
+            .all()
         
         return dict(language_counts)
     
     def _get_skill_distribution(self) -> Dict[str, int]:
         """Get distribution of user skill levels"""
         
-        users = User.query.all()
-        skill_counts = Counter(user.skill_level for user in users)
+        skill_counts = db.session.query(User.skill_level, db.func.count(User.id))\
+            .group_by(User.skill_level)\
+            .all()
         
         return dict(skill_counts)
 
@@ -412,11 +667,9 @@ class LearningAnalytics:
         """Analyze user's learning trajectory over time"""
         
         # Get user's progress metrics over time
-        metrics = ProgressMetric.query.filter_by(user_id=user_id)\
-            .order_by(ProgressMetric.recorded_at.asc())\
-            .all()
+        metrics = _load_metric_table(ProgressMetric.user_id == user_id)
         
-        if not metrics:
+        if not metrics.size:
             return {'trajectory': 'insufficient_data'}
         
         # Analyze different aspects of learning
@@ -433,71 +686,71 @@ class LearningAnalytics:
             'overall_trajectory': self._classify_trajectory(quality_trend, complexity_trend)
         }
     
-    def _analyze_quality_trend(self, metrics: List[ProgressMetric]) -> Dict[str, Any]:
+    def _analyze_quality_trend(self, metrics: np.ndarray) -> Dict[str, Any]:
         """Analyze code quality improvement trend"""
         
-        quality_metrics = [m for m in metrics if m.metric_name == 'code_quality']
+        values = metrics['value'][metrics['name'] == 'code_quality']
         
-        if len(quality_metrics) < 2:
+        if values.size < 2:
             return {'trend': 'insufficient_data'}
         
-        values = [m.metric_value for m in quality_metrics]
-        timestamps = [m.recorded_at for m in quality_metrics]
         
         # Calculate trend
-        trend_slope = np.polyfit(range(len(values)), values, 1)[0]
+        trend_slope = _trend_slope(values)
         
         return {
             'trend': 'improving' if trend_slope > 0.1 else 'stable' if abs(trend_slope) <= 0.1 else 'declining',
             'slope': trend_slope,
-            'current_average': np.mean(values[-5:]) if len(values) >= 5 else np.mean(values),
+            'current_average': _recent_mean(values, 5),
             'improvement_rate': trend_slope * 30  # Monthly improvement rate
         }
     
-    def _analyze_complexity_trend(self, metrics: List[ProgressMetric]) -> Dict[str, Any]:
+    def _analyze_complexity_trend(self, metrics: np.ndarray) -> Dict[str, Any]:
         """Analyze complexity handling improvement trend"""
         
-        complexity_metrics = [m for m in metrics if m.metric_name == 'complexity_handling']
+        values = metrics['value'][metrics['name'] == 'complexity_handling']
         
-        if len(complexity_metrics) < 2:
+        if values.size < 2:
             return {'trend': 'insufficient_data'}
         
-        values = [m.metric_value for m in complexity_metrics]
-        trend_slope = np.polyfit(range(len(values)), values, 1)[0]
+        trend_slope = _trend_slope(values)
         
         return {
             'trend': 'improving' if trend_slope > 0.1 else 'stable' if abs(trend_slope) <= 0.1 else 'declining',
             'slope': trend_slope,
-            'current_level': np.mean(values[-3:]) if len(values) >= 3 else np.mean(values)
+            'current_level': _recent_mean(values, 3)
         }
     
-    def _analyze_skill_development(self, metrics: List[ProgressMetric]) -> Dict[str, Any]:
+    def _analyze_skill_development(self, metrics: np.ndarray) -> Dict[str, Any]:
         """Analyze development of specific skills"""
         
-        skill_metrics = [m for m in metrics if m.metric_name.startswith('skill_')]
+        if not metrics.size:
+            return {}
         
-        skills_progress = defaultdict(int)
-        for metric in skill_metrics:
-            skill_name = metric.metric_name.replace('skill_', '')
-            skills_progress[skill_name] += metric.metric_value
+        # Sum values per metric name, then keep the skill_* names in order of first appearance
+        names, first_seen, name_index = np.unique(metrics['name'], return_index=True, return_inverse=True)
+        totals = np.bincount(name_index, weights=metrics['value'], minlength=names.size).tolist()
         
-        return dict(skills_progress)
+        return {
+            names[i].replace('skill_', ''): totals[i]
+            for i in np.argsort(first_seen).tolist()
+            if names[i].startswith('skill_')
+        }
     
-    def _calculate_learning_velocity(self, metrics: List[ProgressMetric]) -> Dict[str, Any]:
+    def _calculate_learning_velocity(self, metrics: np.ndarray) -> Dict[str, Any]:
         """Calculate learning velocity (rate of progress)"""
         
-        if len(metrics) < 2:
+        if metrics.size < 2:
             return {'velocity': 'insufficient_data'}
         
         # Calculate metrics per week
-        first_date = metrics[0].recorded_at
-        last_date = metrics[-1].recorded_at
-        weeks_span = (last_date - first_date).days / 7
+        recorded_at = metrics['recorded_at']
+        weeks_span = int(_whole_days(recorded_at[-1] - recorded_at[0])) / 7
         
         if weeks_span < 1:
             return {'velocity': 'insufficient_timespan'}
         
-        sessions_per_week = len([m for m in metrics if m.metric_name == 'learning_session']) / weeks_span
+        sessions_per_week = int(np.count_nonzero(metrics['name'] == 'learning_session')) / weeks_span
         
         return {
             'sessions_per_week': sessions_per_week,
@@ -532,23 +785,34 @@ class LearningAnalytics:
 class RecommendationTracker:
     """Track effectiveness and impact of learning recommendations"""
     
+    # Per-user ring buffer size; the oldest records are dropped first
+    MAX_RECOMMENDATIONS_PER_USER = 1000
+    
     def __init__(self):
-        self.recommendations_storage = []  # In production, this would be a database table
+        # In production, this would be a database table. Records are appended
+        # as they are generated, so each user's deque is ordered by generated_at
+        self.recommendations_storage: Dict[int, Deque[Dict[str, Any]]] = defaultdict(
+            lambda: deque(maxlen=self.MAX_RECOMMENDATIONS_PER_USER)
+        )
+        # Request threads append while others read; deques can't be iterated during appends
+        self._storage_lock = threading.Lock()
     
     def store_recommendation(self, recommendation_record: Dict[str, Any]):
         """Store a recommendation record for later analysis"""
-        self.recommendations_storage.append(recommendation_record)
+        with self._storage_lock:
+            self.recommendations_storage[recommendation_record['user_id']].append(recommendation_record)
     
     def analyze_effectiveness(self, user_id: int, timeframe_days: int) -> Dict[str, Any]:
         """Analyze effectiveness of recommendations for a user"""
         
         cutoff_date = datetime.utcnow() - timedelta(days=timeframe_days)
         
-        # Get recommendations in timeframe
-        user_recommendations = [
-            r for r in self.recommendations_storage 
-            if r['user_id'] == user_id and r['generated_at'] >= cutoff_date
-        ]
+        with self._storage_lock:
+            stored = list(self.recommendations_storage.get(user_id, ()))
+        
+        # Get recommendations in timeframe by walking back from the newest
+        recent = takewhile(lambda r: r['generated_at'] >= cutoff_date, reversed(stored))
+        user_recommendations = list(recent)[::-1]
         
         if not user_recommendations:
             return {'effectiveness': 'no_recommendations'}
@@ -571,22 +835,30 @@ class RecommendationTracker:
         """Analyze improvement in metrics after recommendations"""
         
         improvement_scores = []
+        before_window = timedelta(days=7)
+        after_window = timedelta(days=14)
+        rec_dates = [rec['generated_at'] for rec in recommendations]
+        
+        # Load every metric that falls in any recommendation's window with one query
+        metric_table = _load_metric_table(
+            ProgressMetric.user_id == user_id,
+            ProgressMetric.recorded_at >= min(rec_dates) - before_window,
+            ProgressMetric.recorded_at <= max(rec_dates) + after_window
+        )
+        recorded_at = metric_table['recorded_at']
         
-        for rec in recommendations:
-            rec_date = rec['generated_at']
+        for rec_date in rec_dates:
+            rec_ts = np.datetime64(rec_date, 'us')
             
-            # Get metrics before and after recommendation
-            before_metrics = ProgressMetric.query.filter_by(user_id=user_id)\
-                .filter(ProgressMetric.recorded_at < rec_date)\
-                .filter(ProgressMetric.recorded_at >= rec_date - timedelta(days=7))\
-                .all()
+            # Metrics from the week before and the two weeks after the recommendation. The
+            # session that generated it stamps its own metrics with the same time, so those
+            # count as "after"
+            before_start, before_end = np.searchsorted(recorded_at, [rec_ts - before_window, rec_ts], side='left')
+            after_end = np.searchsorted(recorded_at, rec_ts + after_window, side='right')
+            before_metrics = metric_table[before_start:before_end]
+            after_metrics = metric_table[before_end:after_end]
             
-            after_metrics = ProgressMetric.query.filter_by(user_id=user_id)\
-                .filter(ProgressMetric.recorded_at > rec_date)\
-                .filter(ProgressMetric.recorded_at <= rec_date + timedelta(days=14))\
-                .all()
-            
-            if before_metrics and after_metrics:
+            if before_metrics.size and after_metrics.size:
                 improvement = self._calculate_improvement_score(before_metrics, after_metrics)
                 improvement_scores.append(improvement)
         
@@ -612,20 +884,13 @@ class RecommendationTracker:
             'concepts_recommended': 5  # Placeholder
         }
     
-    def _calculate_improvement_score(self, before_metrics: List[ProgressMetric], 
-                                   after_metrics: List[ProgressMetric]) -> float:
-        """Calculate improvement score between before and after metrics"""
-        
-        # Calculate average quality and complexity scores before and after
-        before_quality = np.mean([m.metric_value for m in before_metrics if m.metric_name == 'code_quality'])
-        after_quality = np.mean([m.metric_value for m in after_metrics if m.metric_name == 'code_quality'])
+    def _calculate_improvement_score(self, before_metrics: np.ndarray, 
+                                   after_metrics: np.ndarray) -> float:
+        """Calculate improvement score between before and after metric tables"""
         
-        before_complexity = np.mean([m.metric_value for m in before_metrics if m.metric_name == 'complexity_handling'])
-        after_complexity = np.mean([m.metric_value for m in after_metrics if m.metric_name == 'complexity_handling'])
-        
-        # Calculate improvement (positive is better)
-        quality_improvement = after_quality - before_quality
-        complexity_improvement = after_complexity - before_complexity
+        # Calculate improvement in average quality and complexity (positive is better)
+        quality_improvement = _mean_change(before_metrics, after_metrics, 'code_quality')
+        complexity_improvement = _mean_change(before_metrics, after_metrics, 'complexity_handling')
         
         # Weighted average improvement
         return (quality_improvement * 0.6 + complexity_improvement * 0.4)
@@ -654,22 +919,33 @@ class RecommendationTracker:
             return 'low_effectiveness'
 
 
+# Minimum success probability for each confidence label above 'low'
+CONFIDENCE_THRESHOLDS = (0.6, 0.8)
+CONFIDENCE_LEVELS = ('low', 'medium', 'high')
+
+# The only metric kinds learning patterns are derived from
+PATTERN_METRICS = ('learning_session', 'code_quality')
+
+
 class ProgressPredictor:
     """Predict learning outcomes and progress"""
     
+    def __init__(self):
+        # Learning patterns per (user, metrics version); reused across proposed paths
+        self._patterns_cache = ResultCache(maxsize=512, ttl=60)
+    
     def predict_outcomes(self, user_id: int, 
                         proposed_learning_path: Dict[str, Any]) -> Dict[str, Any]:
         """Predict learning outcomes for a proposed learning path"""
         
-        # Get user's historical data
-        user_metrics = ProgressMetric.query.filter_by(user_id=user_id).all()
+        learning_patterns = self._patterns_cache.get_or_compute(
+            (user_id, _metrics_version(user_id)),
+            lambda: self._get_learning_patterns(user_id)
+        )
         
-        if len(user_metrics) < 5:
+        if learning_patterns is None:
             return {'prediction': 'insufficient_historical_data'}
         
-        # Analyze learning patterns
-        learning_patterns = self._analyze_learning_patterns(user_metrics)
-        
         # Predict completion time
         predicted_completion_time = self._predict_completion_time(
             learning_patterns, proposed_learning_path
@@ -692,44 +968,59 @@ class ProgressPredictor:
             'optimization_suggestions': optimization_suggestions
         }
     
-    def _analyze_learning_patterns(self, metrics: List[ProgressMetric]) -> Dict[str, Any]:
-        """Analyze user's learning patterns from historical data"""
-        
-        # Calculate learning velocity
-        sessions = [m for m in metrics if m.metric_name == 'learning_session']
-        if len(sessions) >= 2:
-            time_between_sessions = [(sessions[i].recorded_at - sessions[i-1].recorded_at).days 
-                                   for i in range(1, len(sessions))]
-            avg_session_interval = np.mean(time_between_sessions)
+    def _get_learning_patterns(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Learning patterns from the user's history, or None if there is too little of it"""
+        history_size = db.session.query(db.func.count(ProgressMetric.id))\
+            .filter(ProgressMetric.user_id == user_id)\
+            .scalar()
+        
+        if history_size < 5:
+            return None
+        
+        # Load just the rows the patterns read rather than the whole history
+        user_metrics = _load_metric_table(
+            ProgressMetric.user_id == user_id,
+            ProgressMetric.metric_name.in_(PATTERN_METRICS)
+        )
+        return self._analyze_learning_patterns(user_metrics)
+    
+    def _analyze_learning_patterns(self, metrics: np.ndarray) -> Dict[str, Any]:
+        """Analyze learning patterns from a time-ordered table of PATTERN_METRICS rows"""
+        
+        # The table holds only the two pattern metrics, so one mask splits it
+        is_session = metrics['name'] == 'learning_session'
+        session_times = metrics['recorded_at'][is_session]
+        
+        # Calculate learning velocity; the intervals also feed the consistency score
+        time_between_sessions = _whole_days(np.diff(session_times))
+        if time_between_sessions.size:
+            # Exact integer sum; cheaper than np.mean at the history sizes seen in practice
+            avg_session_interval = sum(time_between_sessions.tolist()) / time_between_sessions.size
         else:
             avg_session_interval = 7  # Default to weekly
         
         # Calculate improvement rate
-        quality_metrics = [m for m in metrics if m.metric_name == 'code_quality']
-        if len(quality_metrics) >= 3:
-            values = [m.metric_value for m in quality_metrics]
-            improvement_rate = np.polyfit(range(len(values)), values, 1)[0]
+        values = metrics['value'][~is_session]
+        if len(values) >= 3:
+            improvement_rate = _trend_slope(values)
         else:
             improvement_rate = 0.1  # Default slow improvement
         
         return {
             'average_session_interval_days': avg_session_interval,
             'improvement_rate': improvement_rate,
-            'total_sessions': len(sessions),
-            'learning_consistency': self._calculate_consistency(sessions)
+            'total_sessions': len(session_times),
+            'learning_consistency': self._calculate_consistency(time_between_sessions)
         }
     
-    def _calculate_consistency(self, sessions: List[ProgressMetric]) -> float:
-        """Calculate learning consistency score"""
-        if len(sessions) < 3:
+    def _calculate_consistency(self, intervals: np.ndarray) -> float:
+        """Calculate learning consistency score from whole-day gaps between sessions"""
+        if intervals.size < 2:
             return 0.5
+        if numba is None and intervals.size < SMALL_SAMPLE_SIZE:
+            return _small_consistency(intervals.tolist())
         
-        intervals = [(sessions[i].recorded_at - sessions[i-1].recorded_at).days 
-                    for i in range(1, len(sessions))]
-        
-        # Lower standard deviation indicates higher consistency
-        consistency = 1 / (1 + np.std(intervals))
-        return min(consistency, 1.0)
+        return _consistency_kernel(intervals)
     
     def _predict_completion_time(self, learning_patterns: Dict, 
                                learning_path: Dict) -> Dict[str, Any]:
@@ -759,29 +1050,16 @@ class ProgressPredictor:
                                    learning_path: Dict) -> Dict[str, Any]:
         """Predict probability of successfully completing learning path"""
         
-        consistency = learning_patterns['learning_consistency']
-        improvement_rate = learning_patterns['improvement_rate']
-        total_sessions = learning_patterns['total_sessions']
-        
-        # Calculate base probability
-        base_probability = 0.5
-        
-        # Adjust based on patterns
-        if consistency > 0.7:
-            base_probability += 0.2
-        if improvement_rate > 0.1:
-            base_probability += 0.15
-        if total_sessions > 20:
-            base_probability += 0.1
-        
-        # Adjust based on path difficulty
+        # Adjust a 0.5 base for consistency, improvement, experience and path difficulty
         path_difficulty = learning_path.get('difficulty_level', 'intermediate')
-        if path_difficulty == 'advanced':
-            base_probability -= 0.15
-        elif path_difficulty == 'beginner':
-            base_probability += 0.1
-        
-        success_probability = max(0.1, min(0.95, base_probability))
+        features = np.array([
+            learning_patterns['learning_consistency'],
+            learning_patterns['improvement_rate'],
+            learning_patterns['total_sessions']
+        ], dtype=np.float64)
+        success_probability = _success_probability_kernel(
+            features, DIFFICULTY_ADJUSTMENTS.get(path_difficulty, 0.0)
+        )
         
         return {
             'probability': success_probability,
@@ -791,12 +1069,7 @@ class ProgressPredictor:
     
     def _get_confidence_level(self, probability: float) -> str:
         """Get confidence level for prediction"""
-        if probability >= 0.8:
-            return 'high'
-        elif probability >= 0.6:
-            return 'medium'
-        else:
-            return 'low'
+        return CONFIDENCE_LEVELS[bisect.bisect_right(CONFIDENCE_THRESHOLDS, probability)]
     
     def _identify_key_factors(self, learning_patterns: Dict) -> List[str]:
         """Identify key factors affecting success probability"""
@@ -1,27 +1,101 @@
+import asyncio
+import functools
+import orjson
 import os
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .result_cache import ResultCache, content_key
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 GEMINI_API_URL = 'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent'
+GEMINI_STREAM_API_URL = 'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:streamGenerateContent'
+GEMINI_HEADERS = {
+    'Content-Type': 'application/json',
+}
+GEMINI_TIMEOUT = (5, 60)  # (connect, read) seconds
+# Partial-response field mask: only the generated text plus what's needed to explain an empty answer
+GEMINI_RESPONSE_FIELDS = 'candidates.content.parts.text,candidates.finishReason,promptFeedback'
 
+# Request URL with the key and field mask encoded once, rather than re-encoding params per call
+GEMINI_REQUEST_URL = (
+    f"{GEMINI_API_URL}?{urlencode({'key': GEMINI_API_KEY, 'fields': GEMINI_RESPONSE_FIELDS})}"
+    if GEMINI_API_KEY else None
+)
+GEMINI_STREAM_REQUEST_URL = (
+    f"{GEMINI_STREAM_API_URL}?{urlencode({'key': GEMINI_API_KEY, 'alt': 'sse'})}"
+    if GEMINI_API_KEY else None
+)
+
+# Only near-deterministic completions are worth replaying from the cache
+CACHEABLE_MAX_TEMPERATURE = 0.3
+_RESPONSE_CACHE = ResultCache(maxsize=1024, ttl=7 * 86400)
+
+# Concurrent requests allowed in flight per batch, to stay under Gemini's QPS limit
+GEMINI_BATCH_CONCURRENCY = 8
+# Client-side request budget (free tier default); bursts up to a minute's worth
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '60'))
+
+
+class _TokenBucket:
+    """Thread-safe token bucket; consume() blocks until the request fits the rate"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, tokens=1):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the tokens now, going into debt, so waiters are served in arrival order
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
 
-def call_gemini(prompt, temperature=0.2, max_tokens=1024):
-    """
-    Call Gemini 2.0 Flash API with the given prompt and return the response.
-    """
-    if not GEMINI_API_KEY:
-        raise ValueError('GEMINI_API_KEY is not set in the environment.')
 
-    headers = {
-        'Content-Type': 'application/json',
-    }
-    params = {
-        'key': GEMINI_API_KEY
-    }
-    data = {
+_BUCKET = _TokenBucket(rate=GEMINI_REQUESTS_PER_MINUTE / 60, capacity=GEMINI_REQUESTS_PER_MINUTE)
+
+# Long-lived so a cancelled batch never waits on an executor shutdown inside the event loop;
+# dedicated so the default executor's (CPU-sized) worker count doesn't cap concurrency
+_BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=GEMINI_BATCH_CONCURRENCY, thread_name_prefix='gemini-batch')
+
+
+def _create_session():
+    """Pooled keep-alive session so repeated calls reuse one TLS connection"""
+    session = requests.Session()
+    # Rate-limited/unavailable responses are retried with exponential backoff, waiting
+    # out the server's Retry-After header when it sends one
+    retries = Retry(
+        total=5,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({'POST'}),
+        respect_retry_after_header=True
+    )
+    session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries))
+    return session
+
+
+_SESSION = _create_session()
+
+
+def _request_body(prompt, temperature, max_tokens):
+    """Serialized generateContent request for a single-turn prompt"""
+    return orjson.dumps({
         'contents': [{
             'parts': [{
                 'text': prompt
@@ -31,12 +105,86 @@ def call_gemini(prompt, temperature=0.2, max_tokens=1024):
             'temperature': temperature,
             'maxOutputTokens': max_tokens
         }
-    }
-    response = requests.post(GEMINI_API_URL, headers=headers, params=params, json=data)
+    })
+
+
+def call_gemini(prompt, temperature=0.2, max_tokens=1024, ignore_cache=False):
+    """
+    Call Gemini 2.0 Flash API with the given prompt and return the response.
+
+    Low-temperature responses are memoized per (prompt, temperature, max_tokens);
+    pass ignore_cache=True to force a fresh completion.
+    """
+    if not GEMINI_REQUEST_URL:
+        raise ValueError('GEMINI_API_KEY is not set in the environment.')
+
+    cacheable = temperature <= CACHEABLE_MAX_TEMPERATURE
+    key = content_key(prompt, temperature, max_tokens)
+    if cacheable and not ignore_cache:
+        cached = _RESPONSE_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+    _BUCKET.consume()
+    response = _SESSION.post(GEMINI_REQUEST_URL, headers=GEMINI_HEADERS,
+                             data=_request_body(prompt, temperature, max_tokens), timeout=GEMINI_TIMEOUT)
     response.raise_for_status()
-    result = response.json()
+    result = orjson.loads(response.content)
     # Extract the generated text from the response
     try:
-        return result['candidates'][0]['content']['parts'][0]['text']
+        text = result['candidates'][0]['content']['parts'][0]['text']
     except (KeyError, IndexError):
         return result
+
+    if cacheable:
+        _RESPONSE_CACHE.set(key, text)
+    return text
+
+
+def stream_gemini(prompt, temperature=0.2, max_tokens=1024):
+    """
+    Stream a Gemini completion, yielding text deltas as server-sent events arrive.
+
+    Streamed completions bypass the response cache; callers that only need the
+    final text can use ''.join(stream_gemini(prompt)).
+    """
+    if not GEMINI_STREAM_REQUEST_URL:
+        raise ValueError('GEMINI_API_KEY is not set in the environment.')
+
+    _BUCKET.consume()
+    with _SESSION.post(GEMINI_STREAM_REQUEST_URL, headers=GEMINI_HEADERS,
+                       data=_request_body(prompt, temperature, max_tokens),
+                       timeout=GEMINI_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith(b'data:'):
+                continue
+            chunk = orjson.loads(line[5:])
+            # Chunks without text (e.g. the final finishReason/usage event) carry no delta
+            try:
+                yield chunk['candidates'][0]['content']['parts'][0]['text']
+            except (KeyError, IndexError):
+                continue
+
+
+async def acall_gemini_batch(prompts, temperature=0.2, max_tokens=1024, ignore_cache=False):
+    """Async variant of call_gemini_batch for callers already inside an event loop"""
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*[
+        loop.run_in_executor(
+            _BATCH_EXECUTOR,
+            functools.partial(call_gemini, prompt, temperature, max_tokens, ignore_cache)
+        )
+        for prompt in prompts
+    ])
+
+
+def call_gemini_batch(prompts, temperature=0.2, max_tokens=1024, ignore_cache=False):
+    """
+    Call Gemini for several independent prompts concurrently.
+
+    Requests share the pooled session and at most GEMINI_BATCH_CONCURRENCY are
+    in flight at once across all batches; results are returned in the same
+    order as prompts.
+    """
+    return asyncio.run(acall_gemini_batch(prompts, temperature, max_tokens, ignore_cache))
@@ -1,8 +1,229 @@
+import ast
+import logging
 import os
-import json
-from typing import Dict, Any, List, Optional
-import google.generativeai as genai
+import re
+import orjson
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from .code_analyzer import CodeAnalyzer
+from .result_cache import ResultCache, content_key
+
+logger = logging.getLogger(__name__)
+
+
+# Personality types and their characteristics; static, so built once at import
+PERSONALITY_TYPES = {
+    'analytical': {
+        'name': 'The Analytical Thinker',
+        'description': 'Loves algorithms, data structures, and understanding systems deeply',
+        'focus_areas': ['algorithms', 'complexity_analysis', 'mathematical_foundations', 'optimization'],
+        'learning_style': 'systematic and thorough',
+        'preferred_feedback': 'detailed technical explanations with mathematical rigor'
+    },
+    'creative': {
+        'name': 'The Creative Builder',
+        'description': 'Enjoys building unique solutions and creative applications',
+        'focus_areas': ['innovation', 'user_experience', 'alternative_approaches', 'experimentation'],
+        'learning_style': 'exploratory and experimental',
+        'preferred_feedback': 'creative alternatives and innovative approaches'
+    },
+    'practical': {
+        'name': 'The Practical Problem Solver',
+        'description': 'Focuses on real-world applications and best practices',
+        'focus_areas': ['best_practices', 'maintainability', 'scalability', 'industry_standards'],
+        'learning_style': 'structured and methodical',
+        'preferred_feedback': 'practical improvements and industry best practices'
+    },
+    'collaborative': {
+        'name': 'The Collaborative Communicator',
+        'description': 'Thrives in team environments and values knowledge sharing',
+        'focus_areas': ['code_readability', 'documentation', 'team_collaboration', 'mentoring'],
+        'learning_style': 'social and discussion-based',
+        'preferred_feedback': 'communication tips and collaborative development practices'
+    }
+}
+
+
+def _analysis_personality_context(personality_data: Dict[str, Any]) -> str:
+    """Personality section of the code analysis prompt."""
+    return f"""
+Student Personality Type: {personality_data['name']}
+Learning Style: {personality_data['learning_style']}
+Preferred Feedback: {personality_data['preferred_feedback']}
+Focus Areas: {', '.join(personality_data['focus_areas'])}
+"""
+
+
+def _personality_profile(personality_type: str, personality_data: Dict[str, Any]) -> str:
+    """Student profile section of the personality recommendations prompt."""
+    return f"""Student Profile:
+- Personality Type: {personality_data['name']} ({personality_type})
+- Description: {personality_data['description']}
+- Learning Style: {personality_data['learning_style']}
+- Focus Areas: {', '.join(personality_data['focus_areas'])}
+- Preferred Feedback Style: {personality_data['preferred_feedback']}"""
+
+
+# Per-type prompt sections only depend on the static catalogue, so render them once
+ANALYSIS_PERSONALITY_CONTEXTS = {
+    ptype: _analysis_personality_context(data) for ptype, data in PERSONALITY_TYPES.items()
+}
+PERSONALITY_PROFILES = {
+    ptype: _personality_profile(ptype, data) for ptype, data in PERSONALITY_TYPES.items()
+}
+
+# Static part of the fallback personality insights, used when Gemini is unavailable
+FALLBACK_PERSONALITY_INSIGHTS = {
+    'analytical': {
+        'personalized_feedback': 'Focus on understanding the algorithmic complexity and mathematical foundations of your solution.',
+        'learning_path_suggestions': [
+            'Study algorithm design and analysis',
+            'Practice complexity analysis',
+            'Learn formal verification methods',
+            'Explore mathematical optimization techniques'
+        ],
+        'personality_strengths': [
+            'Strong logical thinking helps in algorithm design',
+            'Attention to detail aids in finding edge cases',
+            'Systematic approach leads to robust solutions'
+        ],
+        'growth_opportunities': [
+            'Consider user experience and practical applications',
+            'Practice explaining complex concepts simply',
+            'Balance theoretical perfection with practical constraints'
+        ]
+    },
+    'creative': {
+        'personalized_feedback': 'Explore alternative approaches and consider the user experience of your solution.',
+        'learning_path_suggestions': [
+            'Experiment with different programming paradigms',
+            'Study user interface and experience design',
+            'Practice creative problem-solving techniques',
+            'Build projects that showcase innovation'
+        ],
+        'personality_strengths': [
+            'Innovative thinking leads to unique solutions',
+            'Adaptability helps in learning new technologies',
+            'Creative approach makes code more engaging'
+        ],
+        'growth_opportunities': [
+            'Focus on code efficiency and optimization',
+            'Learn systematic debugging approaches',
+            'Practice following established patterns and conventions'
+        ]
+    },
+    'practical': {
+        'personalized_feedback': 'Focus on code maintainability, best practices, and real-world applicability.',
+        'learning_path_suggestions': [
+            'Study software engineering best practices',
+            'Learn design patterns and architectural principles',
+            'Practice test-driven development',
+            'Focus on scalable and maintainable code'
+        ],
+        'personality_strengths': [
+            'Focus on best practices ensures quality code',
+            'Practical mindset leads to usable solutions',
+            'Systematic approach aids in project management'
+        ],
+        'growth_opportunities': [
+            'Explore innovative and creative approaches',
+            'Study theoretical computer science concepts',
+            'Practice thinking outside conventional solutions'
+        ]
+    },
+    'collaborative': {
+        'personalized_feedback': 'Focus on code readability, documentation, and team collaboration aspects.',
+        'learning_path_suggestions': [
+            'Practice code review and pair programming',
+            'Learn technical communication skills',
+            'Study open source contribution practices',
+            'Focus on mentoring and knowledge sharing'
+        ],
+        'personality_strengths': [
+            'Strong communication aids in team development',
+            'Collaborative mindset improves code quality',
+            'Teaching others reinforces your own learning'
+        ],
+        'growth_opportunities': [
+            'Develop independent problem-solving skills',
+            'Practice deep technical analysis',
+            'Focus on individual coding challenges'
+        ]
+    }
+}
+
+# Response schemas in compact one-line form; the keys are what the rest of the analyzer reads
+ANALYSIS_RESPONSE_SCHEMA = (
+    '{"algorithm_explanation": str, "optimization_suggestions": [str], "learning_concepts": [str], '
+    '"alternative_approaches": [str], "code_quality_feedback": str, "complexity_explanation": str, '
+    '"interview_tips": [str], "related_problems": [str], "conceptual_gaps": [str], "positive_aspects": [str]}'
+)
+PERSONALITY_RESPONSE_SCHEMA = (
+    '{"personalized_feedback": str, "learning_path_suggestions": [str], "personality_strengths": [str], '
+    '"growth_opportunities": [str], '
+    '"recommended_resources": [{"title": str, "type": "book|course|tutorial|practice", "reason": str, '
+    '"difficulty": "beginner|intermediate|advanced"}], '
+    '"practice_problems": [{"title": str, "difficulty": "easy|medium|hard", "reason": str, "focus_area": str}], '
+    '"collaboration_tips": [str], "motivation_boosters": [str], "learning_strategies": [str]}'
+)
+ASSESSMENT_RESPONSE_SCHEMA = (
+    '{"likely_personality_traits": {"analytical": int, "creative": int, "practical": int, "collaborative": int}, '
+    '"reasoning": str, "dominant_trait": str, "code_style_indicators": [str], "recommendations": [str]}'
+)
+
+# Longest code sent to Gemini verbatim; longer Python is cut down to its most complex functions
+LLM_MAX_CODE_CHARS = 8000
+
+
+def _condense_code(code: str, language: str) -> str:
+    """Fit code into LLM_MAX_CODE_CHARS, keeping the largest top-level functions and methods."""
+    if len(code) <= LLM_MAX_CODE_CHARS:
+        return code
+
+    if language == 'python':
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            tree = None
+        if tree is not None:
+            functions = [node for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            for node in tree.body:
+                if isinstance(node, ast.ClassDef):
+                    functions.extend(
+                        child for child in node.body if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))
+                    )
+
+            # AST size is a cheap proxy for how much there is to say about a function
+            functions.sort(key=lambda node: sum(1 for _ in ast.walk(node)), reverse=True)
+            selected, size = [], 0
+            for node in functions:
+                segment = ast.get_source_segment(code, node, padded=True)
+                if segment and size + len(segment) <= LLM_MAX_CODE_CHARS:
+                    selected.append((node.lineno, segment))
+                    size += len(segment)
+            if selected:
+                selected.sort()
+                excerpt = "\n\n".join(segment for _, segment in selected)
+                return f"# Excerpt: the {len(selected)} most complex functions of a longer file\n{excerpt}"
+
+    return f"{code[:LLM_MAX_CODE_CHARS]}\n... (truncated)"
+
+
+# Gemini completions by (prompt, generation config); the prompt embeds the code, language
+# and personality context, so repeat submissions skip the round-trip for half an hour
+LLM_RESPONSE_TTL = 1800
+_LLM_RESPONSE_CACHE = ResultCache(maxsize=512, ttl=LLM_RESPONSE_TTL)
+
+# Outermost {...} of a response, ignoring any markdown fence or prose around it
+_JSON_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+
+# Analyses in flight at once across analyze_many calls, to stay under Gemini's QPS limit
+LLM_MAX_CONCURRENCY = 8
+# Long-lived so a cancelled analyze_many never waits on an executor shutdown inside the event loop;
+# dedicated so the default executor's (CPU-sized) worker count doesn't cap concurrency
+_ANALYSIS_EXECUTOR = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix='llm-analysis')
 
 
 class LLMEnhancedAnalyzer(CodeAnalyzer):
@@ -11,52 +232,34 @@ class LLMEnhancedAnalyzer(CodeAnalyzer):
     with Gemini 2.0 Flash-powered deep code understanding and personality-based recommendations.
     """
 
+    __slots__ = (
+        'api_key', 'use_llm', 'model', 'personality_types',
+        '_cfg_insights', '_cfg_personality', '_cfg_combined', '_cfg_assess'
+    )
+
     def __init__(self):
         super().__init__()
         self.api_key = os.getenv('GEMINI_API_KEY')
         self.use_llm = bool(self.api_key)
         if self.use_llm:
+            # The SDK pulls in grpc/protobuf, so only load it when Gemini will actually be used
+            import google.generativeai as genai
             genai.configure(api_key=self.api_key)
             self.model = genai.GenerativeModel('gemini-2.0-flash')
+            # Built once and shared by every request to the matching call site
+            self._cfg_insights = genai.types.GenerationConfig(max_output_tokens=1500, temperature=0.3)
+            self._cfg_personality = genai.types.GenerationConfig(max_output_tokens=2000, temperature=0.4)
+            self._cfg_combined = genai.types.GenerationConfig(max_output_tokens=3500, temperature=0.3)
+            self._cfg_assess = genai.types.GenerationConfig(max_output_tokens=1000, temperature=0.3)
         
-        # Define personality types and their characteristics
-        self.personality_types = {
-            'analytical': {
-                'name': 'The Analytical Thinker',
-                'description': 'Loves algorithms, data structures, and understanding systems deeply',
-                'focus_areas': ['algorithms', 'complexity_analysis', 'mathematical_foundations', 'optimization'],
-                'learning_style': 'systematic and thorough',
-                'preferred_feedback': 'detailed technical explanations with mathematical rigor'
-            },
-            'creative': {
-                'name': 'The Creative Builder',
-                'description': 'Enjoys building unique solutions and creative applications',
-                'focus_areas': ['innovation', 'user_experience', 'alternative_approaches', 'experimentation'],
-                'learning_style': 'exploratory and experimental',
-                'preferred_feedback': 'creative alternatives and innovative approaches'
-            },
-            'practical': {
-                'name': 'The Practical Problem Solver',
-                'description': 'Focuses on real-world applications and best practices',
-                'focus_areas': ['best_practices', 'maintainability', 'scalability', 'industry_standards'],
-                'learning_style': 'structured and methodical',
-                'preferred_feedback': 'practical improvements and industry best practices'
-            },
-            'collaborative': {
-                'name': 'The Collaborative Communicator',
-                'description': 'Thrives in team environments and values knowledge sharing',
-                'focus_areas': ['code_readability', 'documentation', 'team_collaboration', 'mentoring'],
-                'learning_style': 'social and discussion-based',
-                'preferred_feedback': 'communication tips and collaborative development practices'
-            }
-        }
+        self.personality_types = PERSONALITY_TYPES
 
     def analyze_code_with_llm(self, code: str, language: str, personality_type: Optional[str] = None) -> Dict[str, Any]:
         """Enhanced analysis combining traditional methods with Gemini insights and personality-based recommendations."""
         traditional_analysis = self.analyze_code(code, language)
 
         if not self.use_llm:
-            print("⚠️ Gemini API key not found. Using traditional analysis only.")
+            logger.warning("Gemini API key not found. Using traditional analysis only.")
             return traditional_analysis
 
         llm_insights = self._get_llm_insights(code, language, traditional_analysis, personality_type)
@@ -65,32 +268,84 @@ class LLMEnhancedAnalyzer(CodeAnalyzer):
     def analyze_with_personality(self, code: str, language: str, personality_type: str, 
                                personality_scores: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
         """Analyze code with personality-specific recommendations and learning paths."""
-        # Get base analysis
-        analysis = self.analyze_code_with_llm(code, language, personality_type)
-        
-        # Add personality-specific insights
-        personality_insights = self._get_personality_insights(
-            code, language, analysis, personality_type, personality_scores
-        )
+        if not self.use_llm or personality_type not in self.personality_types:
+            # Get base analysis
+            analysis = self.analyze_code_with_llm(code, language, personality_type)
+            
+            # Add personality-specific insights
+            personality_insights = self._get_personality_insights(
+                code, language, analysis, personality_type, personality_scores
+            )
+        else:
+            # One Gemini round-trip answers both the code and the personality prompts
+            traditional_analysis = self.analyze_code(code, language)
+            llm_insights, personality_insights = self._get_combined_insights(
+                code, language, traditional_analysis, personality_type, personality_scores
+            )
+            analysis = self._merge_analyses(traditional_analysis, llm_insights)
         
         analysis['personality_insights'] = personality_insights
         return analysis
 
+    async def aanalyze_with_personality(self, code: str, language: str, personality_type: str,
+                                        personality_scores: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Async variant of analyze_with_personality; runs the blocking Gemini calls in the default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            functools.partial(self.analyze_with_personality, code, language, personality_type, personality_scores)
+        )
+
+    async def aanalyze_code_with_llm(self, code: str, language: str,
+                                     personality_type: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of analyze_code_with_llm; runs the blocking Gemini call in the default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            functools.partial(self.analyze_code_with_llm, code, language, personality_type)
+        )
+
+    async def analyze_many(self, items: List[Tuple[str, str, Optional[str]]]) -> List[Dict[str, Any]]:
+        """Analyze (code, language, personality_type) submissions concurrently, returning results in order."""
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[
+            loop.run_in_executor(
+                _ANALYSIS_EXECUTOR,
+                functools.partial(self.analyze_with_personality, code, language, personality_type)
+                if personality_type else
+                functools.partial(self.analyze_code_with_llm, code, language)
+            )
+            for code, language, personality_type in items
+        ])
+
+    def _cached_generate(self, prompt: str, generation_config) -> str:
+        """Generate text for the prompt, reusing a recent identical completion.
+
+        Only completions carrying a parseable JSON object are kept, so a
+        truncated or malformed reply is retried rather than replayed.
+        """
+        return _LLM_RESPONSE_CACHE.get_or_compute(
+            content_key(prompt, generation_config),
+            lambda: self.model.generate_content(prompt, generation_config=generation_config).text,
+            cache_if=self._has_json_object
+        )
+
+    def _has_json_object(self, response: str) -> bool:
+        """True when the response contains a JSON object that _extract_json can parse."""
+        try:
+            return isinstance(self._extract_json(response), dict)
+        except orjson.JSONDecodeError:
+            return False
+
     def _get_llm_insights(self, code: str, language: str, traditional_analysis: Dict[str, Any], 
                          personality_type: Optional[str] = None) -> Dict[str, Any]:
         """Get insights from Gemini LLM about the code."""
         prompt = self._create_analysis_prompt(code, language, traditional_analysis, personality_type)
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=1500,
-                    temperature=0.3,
-                )
-            )
-            return self._parse_llm_response(response.text)
+            response_text = self._cached_generate(prompt, self._cfg_insights)
+            return self._parse_llm_response(response_text)
         except Exception as e:
-            print(f"Gemini analysis failed: {e}")
+            logger.warning("Gemini analysis failed: %s", e)
             return {}
 
     def _get_personality_insights(self, code: str, language: str, analysis: Dict[str, Any], 
@@ -103,30 +358,53 @@ class LLMEnhancedAnalyzer(CodeAnalyzer):
         prompt = self._create_personality_prompt(code, language, analysis, personality_type, personality_data, personality_scores)
         
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=2000,
-                    temperature=0.4,
-                )
-            )
-            return self._parse_personality_response(response.text, personality_type)
+            response_text = self._cached_generate(prompt, self._cfg_personality)
+            return self._parse_personality_response(response_text, personality_type)
         except Exception as e:
-            print(f"Personality analysis failed: {e}")
+            logger.warning("Personality analysis failed: %s", e)
             return self._get_fallback_personality_insights(personality_type)
 
+    def _get_combined_insights(self, code: str, language: str, traditional_analysis: Dict[str, Any],
+                               personality_type: str, personality_scores: Optional[Dict[str, int]] = None
+                               ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Get code insights and personality insights from a single Gemini request."""
+        prompt = self._create_combined_prompt(
+            code, language, traditional_analysis, personality_type,
+            self.personality_types[personality_type], personality_scores
+        )
+        try:
+            response_text = self._cached_generate(prompt, self._cfg_combined)
+            return self._parse_combined_response(response_text, personality_type)
+        except Exception as e:
+            logger.warning("Combined Gemini analysis failed: %s", e)
+            return {}, self._get_fallback_personality_insights(personality_type)
+
+    def _create_combined_prompt(self, code: str, language: str, traditional_analysis: Dict[str, Any],
+                                personality_type: str, personality_data: Dict[str, Any],
+                                personality_scores: Optional[Dict[str, int]] = None) -> str:
+        """Create one prompt that asks for both the code analysis and the personality recommendations."""
+        analysis_prompt = self._create_analysis_prompt(code, language, traditional_analysis, personality_type)
+        personality_prompt = self._create_personality_prompt(
+            code, language, traditional_analysis, personality_type, personality_data, personality_scores
+        )
+
+        return f"""
+Complete both tasks below. Respond with a single JSON object with exactly two keys:
+"llm_insights" holding the JSON requested by Task 1 and
+"personality_insights" holding the JSON requested by Task 2.
+
+## Task 1
+{analysis_prompt}
+
+## Task 2
+{personality_prompt}
+        """
+
     def _create_analysis_prompt(self, code: str, language: str, traditional_analysis: Dict[str, Any], 
                               personality_type: Optional[str] = None) -> str:
         """Create a comprehensive prompt for LLM analysis."""
-        personality_context = ""
-        if personality_type and personality_type in self.personality_types:
-            personality_data = self.personality_types[personality_type]
-            personality_context = f"""
-Student Personality Type: {personality_data['name']}
-Learning Style: {personality_data['learning_style']}
-Preferred Feedback: {personality_data['preferred_feedback']}
-Focus Areas: {', '.join(personality_data['focus_areas'])}
-"""
+        personality_context = ANALYSIS_PERSONALITY_CONTEXTS.get(personality_type, "")
+        code = _condense_code(code, language)
 
         return f"""
 You are an expert coding mentor and computer science teacher.
@@ -145,26 +423,15 @@ Traditional analysis detected:
 
 {personality_context}
 
-Please provide a JSON response with:
-
-{{
-"algorithm_explanation": "Detailed explanation of the algorithm used",
-"optimization_suggestions": ["specific suggestions for improvement"],
-"learning_concepts": ["key concepts student should understand"],
-"alternative_approaches": ["other ways to solve this problem"],
-"code_quality_feedback": "specific feedback on code style and structure",
-"complexity_explanation": "why this complexity is correct/incorrect",
-"interview_tips": ["tips for explaining this in interviews"],
-"related_problems": ["similar problems to practice"],
-"conceptual_gaps": ["concepts the student might be missing"],
-"positive_aspects": ["what the student did well"]
-}}
+Respond with JSON only ([str] = list of strings):
+{ANALYSIS_RESPONSE_SCHEMA}
         """
 
     def _create_personality_prompt(self, code: str, language: str, analysis: Dict[str, Any], 
                                  personality_type: str, personality_data: Dict[str, Any], 
                                  personality_scores: Optional[Dict[str, int]] = None) -> str:
         """Create a prompt for personality-specific recommendations."""
+        profile = PERSONALITY_PROFILES.get(personality_type) or _personality_profile(personality_type, personality_data)
         scores_context = ""
         if personality_scores:
             scores_context = f"Personality Scores: {personality_scores}"
@@ -172,12 +439,7 @@ Please provide a JSON response with:
         return f"""
 You are a personalized coding education specialist who tailors learning recommendations to individual personality types.
 
-Student Profile:
-- Personality Type: {personality_data['name']} ({personality_type})
-- Description: {personality_data['description']}
-- Learning Style: {personality_data['learning_style']}
-- Focus Areas: {', '.join(personality_data['focus_areas'])}
-- Preferred Feedback Style: {personality_data['preferred_feedback']}
+{profile}
 {scores_context}
 
 Code Analysis Results:
@@ -188,79 +450,62 @@ Code Analysis Results:
 - Patterns Used: {analysis.get('patterns', [])}
 - Algorithms: {analysis.get('algorithms', [])}
 
-Based on this student's personality type and code analysis, provide personalized learning recommendations in JSON format:
-
-{{
-"personalized_feedback": "Feedback tailored to their personality type and learning style",
-"learning_path_suggestions": ["specific next steps aligned with their personality"],
-"personality_strengths": ["how their personality type helps with this code/problem"],
-"growth_opportunities": ["areas where their personality type might face challenges"],
-"recommended_resources": [
-    {{
-        "title": "resource title",
-        "type": "book/course/tutorial/practice",
-        "reason": "why this fits their personality",
-        "difficulty": "beginner/intermediate/advanced"
-    }}
-],
-"practice_problems": [
-    {{
-        "title": "problem title",
-        "difficulty": "easy/medium/hard",
-        "reason": "why this problem suits their learning style",
-        "focus_area": "what skill this develops"
-    }}
-],
-"collaboration_tips": ["how to leverage their personality in team settings"],
-"motivation_boosters": ["personality-specific encouragement and motivation"],
-"learning_strategies": ["study methods that work best for their type"]
-}}
+Based on this student's personality type and code analysis, provide personalized learning recommendations.
+Respond with JSON only ([str] = list of strings, a|b = one of the options):
+{PERSONALITY_RESPONSE_SCHEMA}
         """
 
+    def _extract_json(self, response: str) -> Any:
+        """Parse the JSON object in an LLM response, ignoring markdown fences and surrounding text."""
+        match = _JSON_OBJECT.search(response)
+        return orjson.loads(match.group() if match else response)
+
     def _parse_llm_response(self, response: str) -> Dict[str, Any]:
         """Parse the JSON response from the LLM."""
         try:
-            # Clean the response in case it has markdown formatting
-            response = response.strip()
-            if response.startswith('```json'):
-                response = response[7:]  # Remove ```json
-            if response.endswith('```'):
-                response = response[:-3]  # Remove ```
-            
-            return json.loads(response)
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse LLM response as JSON: {e}")
-            print(f"Response was: {response}")
-            return {
-                "algorithm_explanation": "Unable to parse LLM response",
-                "optimization_suggestions": [],
-                "learning_concepts": [],
-                "alternative_approaches": [],
-                "code_quality_feedback": "Response parsing failed",
-                "complexity_explanation": "Unknown",
-                "interview_tips": [],
-                "related_problems": [],
-                "conceptual_gaps": [],
-                "positive_aspects": []
-            }
+            return self._extract_json(response)
+        except orjson.JSONDecodeError as e:
+            logger.warning("Failed to parse LLM response as JSON: %s", e)
+            logger.debug("Response was: %s", response)
+            return self._get_unparsed_llm_insights()
+
+    def _get_unparsed_llm_insights(self) -> Dict[str, Any]:
+        """Placeholder code insights used when the LLM response cannot be parsed."""
+        return {
+            "algorithm_explanation": "Unable to parse LLM response",
+            "optimization_suggestions": [],
+            "learning_concepts": [],
+            "alternative_approaches": [],
+            "code_quality_feedback": "Response parsing failed",
+            "complexity_explanation": "Unknown",
+            "interview_tips": [],
+            "related_problems": [],
+            "conceptual_gaps": [],
+            "positive_aspects": []
+        }
 
     def _parse_personality_response(self, response: str, personality_type: str) -> Dict[str, Any]:
         """Parse the personality-specific response from the LLM."""
         try:
-            # Clean the response
-            response = response.strip()
-            if response.startswith('```json'):
-                response = response[7:]
-            if response.endswith('```'):
-                response = response[:-3]
-            
-            parsed = json.loads(response)
+            parsed = self._extract_json(response)
             parsed['personality_type'] = personality_type
             return parsed
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse personality response: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.warning("Failed to parse personality response: %s", e)
             return self._get_fallback_personality_insights(personality_type)
 
+    def _parse_combined_response(self, response: str, personality_type: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Split a combined response into (llm_insights, personality_insights)."""
+        try:
+            parsed = self._extract_json(response)
+            llm_insights = parsed['llm_insights']
+            personality_insights = parsed['personality_insights']
+            personality_insights['personality_type'] = personality_type
+            return llm_insights, personality_insights
+        except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning("Failed to parse combined response: %s", e)
+            return self._get_unparsed_llm_insights(), self._get_fallback_personality_insights(personality_type)
+
     def _get_fallback_personality_insights(self, personality_type: str) -> Dict[str, Any]:
         """Provide fallback personality insights when LLM is unavailable."""
         if personality_type not in self.personality_types:
@@ -268,86 +513,11 @@ Based on this student's personality type and code analysis, provide personalized
         
         personality_data = self.personality_types[personality_type]
         
-        fallback_insights = {
-            'analytical': {
-                'personalized_feedback': 'Focus on understanding the algorithmic complexity and mathematical foundations of your solution.',
-                'learning_path_suggestions': [
-                    'Study algorithm design and analysis',
-                    'Practice complexity analysis',
-                    'Learn formal verification methods',
-                    'Explore mathematical optimization techniques'
-                ],
-                'personality_strengths': [
-                    'Strong logical thinking helps in algorithm design',
-                    'Attention to detail aids in finding edge cases',
-                    'Systematic approach leads to robust solutions'
-                ],
-                'growth_opportunities': [
-                    'Consider user experience and practical applications',
-                    'Practice explaining complex concepts simply',
-                    'Balance theoretical perfection with practical constraints'
-                ]
-            },
-            'creative': {
-                'personalized_feedback': 'Explore alternative approaches and consider the user experience of your solution.',
-                'learning_path_suggestions': [
-                    'Experiment with different programming paradigms',
-                    'Study user interface and experience design',
-                    'Practice creative problem-solving techniques',
-                    'Build projects that showcase innovation'
-                ],
-                'personality_strengths': [
-                    'Innovative thinking leads to unique solutions',
-                    'Adaptability helps in learning new technologies',
-                    'Creative approach makes code more engaging'
-                ],
-                'growth_opportunities': [
-                    'Focus on code efficiency and optimization',
-                    'Learn systematic debugging approaches',
-                    'Practice following established patterns and conventions'
-                ]
-            },
-            'practical': {
-                'personalized_feedback': 'Focus on code maintainability, best practices, and real-world applicability.',
-                'learning_path_suggestions': [
-                    'Study software engineering best practices',
-                    'Learn design patterns and architectural principles',
-                    'Practice test-driven development',
-                    'Focus on scalable and maintainable code'
-                ],
-                'personality_strengths': [
-                    'Focus on best practices ensures quality code',
-                    'Practical mindset leads to usable solutions',
-                    'Systematic approach aids in project management'
-                ],
-                'growth_opportunities': [
-                    'Explore innovative and creative approaches',
-                    'Study theoretical computer science concepts',
-                    'Practice thinking outside conventional solutions'
-                ]
-            },
-            'collaborative': {
-                'personalized_feedback': 'Focus on code readability, documentation, and team collaboration aspects.',
-                'learning_path_suggestions': [
-                    'Practice code review and pair programming',
-                    'Learn technical communication skills',
-                    'Study open source contribution practices',
-                    'Focus on mentoring and knowledge sharing'
-                ],
-                'personality_strengths': [
-                    'Strong communication aids in team development',
-                    'Collaborative mindset improves code quality',
-                    'Teaching others reinforces your own learning'
-                ],
-                'growth_opportunities': [
-                    'Develop independent problem-solving skills',
-                    'Practice deep technical analysis',
-                    'Focus on individual coding challenges'
-                ]
-            }
+        # Copy the lists so callers can extend the result without touching the shared template
+        base_insights = {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in FALLBACK_PERSONALITY_INSIGHTS[personality_type].items()
         }
-        
-        base_insights = fallback_insights.get(personality_type, fallback_insights['practical'])
         base_insights.update({
             'personality_type': personality_type,
             'recommended_resources': [
@@ -501,13 +671,14 @@ Based on this student's personality type and code analysis, provide personalized
 
     def get_personality_types(self) -> Dict[str, Dict[str, Any]]:
         """Get all available personality types and their descriptions."""
-        return self.personality_types.copy()
+        return dict(PERSONALITY_TYPES)
 
     def assess_personality_from_code(self, code: str, language: str) -> Dict[str, Any]:
         """Attempt to assess personality traits from code style and approach."""
         if not self.use_llm:
             return {'error': 'LLM not available for personality assessment'}
         
+        code = _condense_code(code, language)
         prompt = f"""
 Analyze the following {language} code and assess the programmer's likely personality traits based on their coding style, approach, and choices.
 
@@ -515,39 +686,14 @@ Analyze the following {language} code and assess the programmer's likely persona
 {code}
 ```
 
-Based on the code style, variable naming, approach to problem-solving, and overall structure, provide a JSON assessment:
-
-{{
-"likely_personality_traits": {{
-    "analytical": 0-10,
-    "creative": 0-10,
-    "practical": 0-10,
-    "collaborative": 0-10
-}},
-"reasoning": "explanation of why you assigned these scores",
-"dominant_trait": "most likely personality type",
-"code_style_indicators": ["specific aspects of the code that indicate personality"],
-"recommendations": ["suggestions based on inferred personality"]
-}}
+Based on the code style, variable naming, approach to problem-solving, and overall structure,
+respond with JSON only (scores are 0-10, [str] = list of strings):
+{ASSESSMENT_RESPONSE_SCHEMA}
         """
         
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=1000,
-                    temperature=0.3,
-                )
-            )
-            
-            # Parse response
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text)
+            response_text = self._cached_generate(prompt, self._cfg_assess)
+            return self._extract_json(response_text)
         except Exception as e:
-            print(f"Personality assessment from code failed: {e}")
+            logger.warning("Personality assessment from code failed: %s", e)
             return {'error': f'Assessment failed: {str(e)}'}
\ No newline at end of file
@@ -7,7 +7,7 @@ from collections import defaultdict, Counter
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 
-from models.database import db, User, Submission, ProgressMetric, KnowledgeGap
+from models.database import db, User, Submission, ProgressMetric, KnowledgeGap, decode_concepts
 
 class ProgressTracker:
     def __init__(self):
@@ -151,23 +151,14 @@ class ProgressTracker:
         # Collect scores for each concept
         for submission in submissions:
             # Data structures
-            if submission.patterns_used:
-                patterns = submission.patterns_used.split(',')
-                for pattern in patterns:
-                    pattern = pattern.strip()
-                    if pattern:
-                        concept_scores[pattern].append(submission.quality_score or 0)
-                        concept_counts[pattern] += 1
+            for pattern in decode_concepts(submission.patterns_used):
+                concept_scores[pattern].append(submission.quality_score or 0)
+                concept_counts[pattern] += 1
             
             # Algorithms
-            if submission.algorithms_identified:
-                try:
-                    algorithms = json.loads(submission.algorithms_identified)
-                    for algorithm in algorithms:
-                        concept_scores[algorithm].append(submission.quality_score or 0)
-                        concept_counts[algorithm] += 1
-                except json.JSONDecodeError:
-                    pass
+            for algorithm in decode_concepts(submission.algorithms_identified):
+                concept_scores[algorithm].append(submission.quality_score or 0)
+                concept_counts[algorithm] += 1
         
         # Calculate mastery levels
         concept_mastery = {}
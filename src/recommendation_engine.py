@@ -1,4 +1,3 @@
-import json
 import numpy as np
 from typing import Dict, List, Any, Tuple
 from collections import defaultdict, Counter
@@ -7,7 +6,7 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.cluster import KMeans
 
-from models.database import db, User, Submission, LearningPath, KnowledgeGap, Resource
+from models.database import db, User, Submission, LearningPath, KnowledgeGap, Resource, decode_concepts
 
 class RecommendationEngine:
     def __init__(self):
@@ -278,14 +277,8 @@ class RecommendationEngine:
         recent_algorithms = []
         
         for submission in submissions:
-            if submission.patterns_used:
-                recent_patterns.extend(submission.patterns_used.split(','))
-            if submission.algorithms_identified:
-                try:
-                    algorithms = json.loads(submission.algorithms_identified)
-                    recent_algorithms.extend(algorithms)
-                except json.JSONDecodeError:
-                    pass
+            recent_patterns.extend(decode_concepts(submission.patterns_used))
+            recent_algorithms.extend(decode_concepts(submission.algorithms_identified))
         
         # Identify missing fundamental concepts
         fundamental_concepts = ['array', 'linked_list', 'hash_table', 'recursion']
@@ -604,14 +597,8 @@ class RecommendationEngine:
         # Extract concepts from submissions
         user_concepts = set()
         for submission in submissions:
-            if submission.patterns_used:
-                user_concepts.update(submission.patterns_used.split(','))
-            if submission.algorithms_identified:
-                try:
-                    algorithms = json.loads(submission.algorithms_identified)
-                    user_concepts.update(algorithms)
-                except json.JSONDecodeError:
-                    pass
+            user_concepts.update(decode_concepts(submission.patterns_used))
+            user_concepts.update(decode_concepts(submission.algorithms_identified))
         
         # Check if all prerequisites are met
         return all(prereq in user_concepts for prereq in prerequisites)
@@ -669,16 +656,8 @@ class RecommendationEngine:
         algorithm_counts = Counter()
         
         for submission in submissions:
-            if submission.patterns_used:
-                patterns = submission.patterns_used.split(',')
-                pattern_counts.update(patterns)
-            
-            if submission.algorithms_identified:
-                try:
-                    algorithms = json.loads(submission.algorithms_identified)
-                    algorithm_counts.update(algorithms)
-                except json.JSONDecodeError:
-                    pass
+            pattern_counts.update(decode_concepts(submission.patterns_used))
+            algorithm_counts.update(decode_concepts(submission.algorithms_identified))
         
         # Identify strengths (frequently used concepts)
         strengths = [concept for concept, count in pattern_counts.most_common(3) if count > 1]
@@ -0,0 +1,116 @@
+"""
+Result Cache
+============
+
+Small thread-safe LRU cache with optional per-entry TTL, used to memoize
+expensive analysis results (LLM round-trips, AST scans) keyed on a content
+hash of their inputs.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional
+
+
+def content_key(*parts: Any) -> str:
+    """Build a stable content-addressed key from the given parts"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """LRU cache with optional TTL; values are deep-copied in and out"""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a copy of the cached value, or default on miss/expiry"""
+        value = self._lookup(key)
+        if value is self._MISSING:
+            return default
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any):
+        """Store a copy of value, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the cached value, computing it at most once across concurrent callers.
+
+        Callers that miss while another thread is already computing the same
+        key wait for that result instead of repeating the work. When cache_if
+        is given, results it rejects are still returned (and shared with those
+        waiting callers) but are not stored.
+        """
+        value = self._lookup(key)
+        if value is not self._MISSING:
+            return copy.deepcopy(value)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            if cache_if is None or cache_if(value):
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _lookup(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                return self._MISSING
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return self._MISSING
+
+            self._data.move_to_end(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not self._MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,6 +1,16 @@
 import unittest
 import sys
 import os
+import threading
+import contextlib
+import io
+import sqlite3
+import tempfile
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from flask import Flask
+from datetime import datetime, timedelta
 
 # Add the parent directory to the path so we can import our modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -8,6 +18,12 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.code_analyzer import CodeAnalyzer
 from src.recommendation_engine import RecommendationEngine
 from src.progress_tracker import ProgressTracker
+from src.enhanced_tracker import EnhancedLearningTracker, LearningAnalytics, _extract_features, RecommendationTracker, _metric_table, _trend_slope
+from src.result_cache import ResultCache, content_key
+from src.llm_enhanced_analyzer import LLMEnhancedAnalyzer, LLM_MAX_CODE_CHARS, _condense_code
+from src.code_validation_tester import CodeValidationTester
+import migrate_database
+from models.database import db, User, Submission, SubmissionBlob, ProgressMetric, bulk_create_submissions, encode_concepts, decode_concepts
 
 class TestCodeAnalyzer(unittest.TestCase):
     def setUp(self):
@@ -60,6 +76,49 @@ def two_pointers_example(arr):
         
         # Should detect two pointers pattern
         self.assertTrue(any('two_pointer' in pattern for pattern in patterns))
+    
+    def test_shared_pattern_reports_every_category(self):
+        """Test that a pattern listed under several data structures flags each of them"""
+        result = self.analyzer.analyze_code("items = []\nitems.append(1)", 'java')
+        
+        self.assertIn('array', result['data_structures'])
+        self.assertIn('stack', result['data_structures'])
+    
+    def test_repeated_analysis_is_cached(self):
+        """Test that re-analyzing a snippet reuses the cached result without sharing it"""
+        code = "def double(values):\n    return [v * 2 for v in values]"
+        first = self.analyzer.analyze_code(code, 'python')
+        first['issues'].append('mutated by caller')
+        second = self.analyzer.analyze_code(code, 'python')
+        
+        self.assertEqual(len(self.analyzer._analysis_cache), 1)
+        self.assertNotIn('mutated by caller', second['issues'])
+    
+    def test_analyze_batch_matches_single_analysis(self):
+        """Test that batch analysis returns the same results, in order"""
+        codes = [
+            ("def add(a, b):\n    return a + b", 'python'),
+            ("for (int i = 0; i < n; i++) { stack.push(i); }", 'java')
+        ]
+        results = CodeAnalyzer.analyze_batch(codes)
+        
+        self.assertEqual(results, [self.analyzer.analyze_code(code, lang) for code, lang in codes])
+    
+    def test_small_input_fast_path(self):
+        """Test that trivial one-liners skip the full analysis unless disabled"""
+        result = self.analyzer.analyze_code("x = [1, 2, 3]", 'python')
+        self.assertEqual(result['data_structures'], [])
+        self.assertEqual(result['metrics'], {'lines_of_code': 1})
+        
+        self.analyzer.fast_small_input = False
+        result = self.analyzer.analyze_code("x = [1, 2, 3]", 'python')
+        self.assertIn('cyclomatic_complexity', result['metrics'])
+    
+    def test_paired_keywords_must_share_a_line(self):
+        """Test that first.*second patterns only match within one line"""
+        self.assertIn('dynamic_programming', self.analyzer._detect_algorithms("dp[i] = dp[i - 1] + 1"))
+        self.assertNotIn('dynamic_programming', self.analyzer._detect_algorithms("dp[i\n]"))
+        self.assertEqual(self.analyzer._estimate_time_complexity_regex("binary " * 20000), "O(n)")
 
 class TestRecommendationEngine(unittest.TestCase):
     def setUp(self):
@@ -117,6 +176,85 @@ class TestProgressTracker(unittest.TestCase):
         self.assertIn('min_score', beginner)
         self.assertIn('max_score', beginner)
 
+class TestEnhancedLearningTracker(unittest.TestCase):
+    def test_personalized_tips_follow_rule_order(self):
+        """Test that every matching tip rule contributes, in table order"""
+        features = _extract_features({'time_complexity': 'O(n^2)', 'quality_score': 5, 'patterns': ['array']})
+        tips = EnhancedLearningTracker()._generate_personalized_tips(
+            features, {'knowledge_gaps': [{'concept': 'recursion'}]}
+        )
+        
+        self.assertEqual(len(tips), 4)
+        self.assertIn('two pointers technique', tips[1])
+        self.assertEqual(EnhancedLearningTracker()._generate_personalized_tips(_extract_features({'quality_score': 9}), {}), [])
+
+    def test_session_metrics_count_toward_recommendation_effectiveness(self):
+        """Test that each session's own metrics fall in its recommendation's after-window"""
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(app)
+        
+        with app.app_context():
+            db.create_all()
+            user = User(username='learner', email='learner@example.com')
+            db.session.add(user)
+            db.session.commit()
+            
+            tracker = EnhancedLearningTracker()
+            for submission_id, (quality, complexity) in enumerate([(5.0, 4.0), (7.0, 6.0), (9.0, 8.0)], 1):
+                analysis = {'quality_score': quality, 'complexity_score': complexity, 'patterns': [], 'algorithms': []}
+                tracker.track_code_analysis_session(user.id, submission_id, analysis, {'knowledge_gaps': []})
+            
+            improvement = tracker.get_recommendation_effectiveness(user.id)['improvement_metrics']
+            db.session.remove()
+            db.drop_all()
+        
+        self.assertEqual(improvement['sample_size'], 2)
+        self.assertAlmostEqual(improvement['average_improvement'], 3.0)
+
+class TestLearningAnalytics(unittest.TestCase):
+    def test_trend_slope_matches_polyfit(self):
+        """Test that the closed-form slope agrees with a degree-1 polyfit"""
+        for values in ([4.0, 6.5], [7.0, 6.0, 8.5, 9.0, 7.5], list(np.linspace(3, 9, 40) ** 0.5)):
+            expected = np.polyfit(range(len(values)), values, 1)[0]
+            self.assertAlmostEqual(_trend_slope(np.asarray(values)), expected)
+    
+    def test_skill_development_sums_per_skill(self):
+        """Test that skill metrics are totalled per skill in first-seen order"""
+        metrics = _metric_table([
+            ProgressMetric(metric_name=name, metric_value=value)
+            for name, value in [('skill_clean_code', 1), ('code_quality', 9), ('skill_recursion', 1), ('skill_clean_code', 2)]
+        ])
+        
+        skills = LearningAnalytics()._analyze_skill_development(metrics)
+        self.assertEqual(list(skills.items()), [('clean_code', 3.0), ('recursion', 1.0)])
+        self.assertEqual(LearningAnalytics()._analyze_skill_development(_metric_table([])), {})
+
+class TestRecommendationTracker(unittest.TestCase):
+    def test_improvement_score_ignores_missing_metrics(self):
+        """Test that a metric absent on one side contributes no improvement"""
+        before = _metric_table([ProgressMetric(metric_name='code_quality', metric_value=5.0)])
+        after = _metric_table([
+            ProgressMetric(metric_name='code_quality', metric_value=7.0),
+            ProgressMetric(metric_name='code_quality', metric_value=8.0),
+            ProgressMetric(metric_name='complexity_handling', metric_value=9.0)
+        ])
+        
+        self.assertAlmostEqual(RecommendationTracker()._calculate_improvement_score(before, after), 1.5)
+    
+    def test_storage_is_a_bounded_per_user_ring(self):
+        """Test that each user keeps only the newest recommendations"""
+        tracker = RecommendationTracker()
+        tracker.MAX_RECOMMENDATIONS_PER_USER = 3
+        start = datetime(2024, 1, 1)
+        for day in range(5):
+            tracker.store_recommendation({'user_id': 1, 'generated_at': start + timedelta(days=day)})
+        
+        stored = [r['generated_at'].day for r in tracker.recommendations_storage[1]]
+        self.assertEqual(stored, [3, 4, 5])
+        self.assertEqual(tracker.analyze_effectiveness(1, 30), {'effectiveness': 'no_recommendations'})
+        self.assertEqual(tracker.analyze_effectiveness(2, 30), {'effectiveness': 'no_recommendations'})
+
 class TestIntegration(unittest.TestCase):
     def setUp(self):
         self.analyzer = CodeAnalyzer()
@@ -148,6 +286,225 @@ def simple_loop(n):
         # This should not crash
         self.assertIsInstance(mock_analysis, dict)
 
+class TestResultCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = ResultCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+    
+    def test_values_are_copied(self):
+        """Test that callers cannot mutate cached results"""
+        cache = ResultCache()
+        cache.set('key', {'patterns': ['two_pointers']})
+        cache.get('key')['patterns'].append('sliding_window')
+        
+        self.assertEqual(cache.get('key'), {'patterns': ['two_pointers']})
+    
+    def test_content_key_is_stable(self):
+        """Test that identical inputs produce identical keys"""
+        self.assertEqual(content_key('code', 'python', None), content_key('code', 'python', None))
+        self.assertNotEqual(content_key('code', 'python'), content_key('code', 'java'))
+    
+    def test_concurrent_misses_compute_once(self):
+        """Test that concurrent callers for the same key share one computation"""
+        cache = ResultCache()
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+        
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'score': 42}
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            leader = pool.submit(cache.get_or_compute, 'key', compute)
+            started.wait(5)
+            followers = [pool.submit(cache.get_or_compute, 'key', compute) for _ in range(3)]
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+        
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result == {'score': 42} for result in results))
+
+    def test_rejected_results_are_not_stored(self):
+        """Test that results failing cache_if are returned but recomputed next time"""
+        cache = ResultCache()
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            return {}
+        
+        self.assertEqual(cache.get_or_compute('key', compute, cache_if=bool), {})
+        self.assertEqual(cache.get_or_compute('key', compute, cache_if=bool), {})
+        self.assertEqual(len(calls), 2)
+        self.assertNotIn('key', cache)
+
+class TestCodeValidationTester(unittest.TestCase):
+    def test_failed_llm_calls_are_retried(self):
+        """Test that a validation whose Gemini calls failed is not served from the cache"""
+        calls = []
+        
+        class UnavailableModel:
+            _generation_config = None
+            
+            def generate_content(self, prompt, generation_config=None):
+                calls.append(prompt)
+                raise RuntimeError('503 Service Unavailable')
+        
+        analyzer = LLMEnhancedAnalyzer()
+        analyzer.use_llm = True
+        analyzer.model = UnavailableModel()
+        analyzer._cfg_insights = None
+        tester = CodeValidationTester(analyzer=analyzer)
+        
+        code = "def add(a, b):\n    return a + b\n"
+        with self.assertLogs('src', level='WARNING'):
+            tester.validate_code_correctness(code, 'python')
+            first_calls = len(calls)
+            tester.validate_code_correctness(code, 'python')
+        
+        self.assertGreater(first_calls, 0)
+        self.assertEqual(len(calls), 2 * first_calls)
+
+class TestConceptColumns(unittest.TestCase):
+    def test_round_trip(self):
+        """Test that encoded concept lists decode back unchanged"""
+        concepts = ['two_pointers', 'sliding_window']
+        self.assertEqual(decode_concepts(encode_concepts(concepts)), concepts)
+    
+    def test_legacy_comma_separated(self):
+        """Test that legacy comma-separated rows still decode"""
+        self.assertEqual(decode_concepts('two_pointers, binary_search,'), ['two_pointers', 'binary_search'])
+        self.assertEqual(decode_concepts(None), [])
+
+class TestSubmissionStorage(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+    
+    def test_bulk_create_dedupes_code_blobs(self):
+        """Test that identical sources share one blob and the caller's rows are left untouched"""
+        rows = [
+            {'problem_title': 'Two Sum', 'language': 'python', 'code': 'print(1)'},
+            {'problem_title': 'Two Sum', 'language': 'python', 'code': 'print(1)'}
+        ]
+        ids = bulk_create_submissions(rows)
+        
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(rows[0], {'problem_title': 'Two Sum', 'language': 'python', 'code': 'print(1)'})
+        self.assertEqual(SubmissionBlob.query.count(), 1)
+        self.assertEqual(db.session.get(Submission, ids[1]).blob.code, 'print(1)')
+    
+    def test_bulk_create_encodes_concept_lists(self):
+        """Test that pattern and algorithm lists are stored in the JSON concept format"""
+        ids = bulk_create_submissions([{
+            'problem_title': 'Two Sum', 'language': 'python',
+            'patterns_used': ['two_pointers', 'sliding_window'], 'algorithms_identified': ['binary_search']
+        }])
+        
+        submission = db.session.get(Submission, ids[0])
+        self.assertEqual(submission.patterns_used, '["two_pointers","sliding_window"]')
+        self.assertEqual(decode_concepts(submission.algorithms_identified), ['binary_search'])
+
+    def test_indexes_migration_upgrades_legacy_submission_table(self):
+        """Test that --indexes relaxes legacy NOT NULL columns and moves inline source into blobs"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'legacy.db')
+            legacy = sqlite3.connect(path)
+            legacy.executescript("""
+                CREATE TABLE user (id INTEGER NOT NULL, username VARCHAR(80) NOT NULL, email VARCHAR(120) NOT NULL,
+                    created_at DATETIME, skill_level VARCHAR(20), preferred_languages TEXT, learning_goals TEXT,
+                    PRIMARY KEY (id), UNIQUE (username), UNIQUE (email));
+                CREATE TABLE submission (id INTEGER NOT NULL, user_id INTEGER NOT NULL,
+                    problem_title VARCHAR(200) NOT NULL, code TEXT NOT NULL, language VARCHAR(50) NOT NULL,
+                    complexity_score FLOAT, quality_score FLOAT, patterns_used TEXT, algorithms_identified TEXT,
+                    lines_of_code INTEGER, cyclomatic_complexity INTEGER, time_complexity VARCHAR(50),
+                    space_complexity VARCHAR(50), submitted_at DATETIME,
+                    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES user (id));
+                INSERT INTO user (id, username, email) VALUES (1, 'legacy', 'legacy@example.com');
+                INSERT INTO submission (id, user_id, problem_title, code, language)
+                    VALUES (1, 1, 'Two Sum', 'print(1)', 'python');
+            """)
+            legacy.close()
+            
+            with mock.patch.dict(os.environ, {'DATABASE_URL': f'sqlite:///{path}'}), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                migrate_database.create_missing_indexes()
+                app = migrate_database.create_app()
+            
+            with app.app_context():
+                ids = bulk_create_submissions([{'problem_title': 'Anonymous', 'language': 'python', 'code': 'print(2)'}])
+                legacy_row = db.session.get(Submission, 1)
+                
+                self.assertIsNone(legacy_row.code)
+                self.assertEqual(legacy_row.source_code, 'print(1)')
+                self.assertEqual(db.session.get(Submission, ids[0]).source_code, 'print(2)')
+                self.assertEqual(SubmissionBlob.query.count(), 2)
+                db.session.remove()
+                db.engine.dispose()
+
+class TestLLMEnhancedAnalyzer(unittest.TestCase):
+    def test_extract_json_ignores_fences_and_prose(self):
+        """Test that the JSON object is found inside fenced or chatty responses"""
+        analyzer = LLMEnhancedAnalyzer()
+        for response in ['{"a": 1}', '```json\n{"a": 1}\n```  ', 'Sure:\n~~~json\n{"a": 1}\n~~~']:
+            self.assertEqual(analyzer._extract_json(response), {'a': 1})
+    
+    def test_unparseable_response_is_logged_and_replaced(self):
+        """Test that a non-JSON response logs a warning and yields placeholder insights"""
+        analyzer = LLMEnhancedAnalyzer()
+        with self.assertLogs('src.llm_enhanced_analyzer', level='WARNING'):
+            insights = analyzer._parse_llm_response('not json')
+        self.assertEqual(insights['algorithm_explanation'], 'Unable to parse LLM response')
+    
+    def test_malformed_completions_are_not_cached(self):
+        """Test that only completions with a parseable JSON object are replayed from the cache"""
+        replies = ['{"truncated": ', '{"complete": true}', 'unused']
+        
+        class ScriptedModel:
+            def generate_content(self, prompt, generation_config=None):
+                return mock.Mock(text=replies.pop(0))
+        
+        analyzer = LLMEnhancedAnalyzer()
+        analyzer.model = ScriptedModel()
+        prompt = 'malformed-completion-cache-test'
+        
+        self.assertEqual(analyzer._cached_generate(prompt, None), '{"truncated": ')
+        self.assertEqual(analyzer._cached_generate(prompt, None), '{"complete": true}')
+        self.assertEqual(analyzer._cached_generate(prompt, None), '{"complete": true}')
+        self.assertEqual(replies, ['unused'])
+    
+    def test_long_code_is_condensed_to_whole_functions(self):
+        """Test that oversized Python keeps only whole functions that fit the budget"""
+        big = "def big(xs):\n" + "".join(f"    xs.append({i})\n" for i in range(600))
+        small = "def small():\n    return 1\n"
+        code = small + "\n" + big + "\n" + small.replace('small', 'tiny')
+        
+        condensed = _condense_code(code, 'python')
+        self.assertLessEqual(len(condensed), LLM_MAX_CODE_CHARS + 100)
+        self.assertIn('def small()', condensed)
+        self.assertNotIn('def big(', condensed)
+        self.assertEqual(_condense_code(small, 'python'), small)
+
 def run_sample_analysis():
     """Run a sample analysis to demonstrate the system"""
     print("Running sample code analysis...")